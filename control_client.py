@@ -7,16 +7,41 @@
 """
 
 import socketio
+import aiohttp
+import asyncio
+import re
 import time
 import os
 import subprocess
 import sys
 import logging
 import threading
+import queue
 import json
 import ssl
 import signal
-from logging.handlers import RotatingFileHandler
+import atexit
+from enum import Enum
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# 可選依賴：orjson序列化比標準庫json快數倍，未安裝時自動退回標準庫
+try:
+    import orjson
+
+    class _OrjsonAdapter:
+        """orjson適配層：提供socketio要求的json模組介面（dumps須返回str）"""
+
+        @staticmethod
+        def dumps(obj, *args, **kwargs):
+            return orjson.dumps(obj).decode('utf-8')
+
+        @staticmethod
+        def loads(s, *args, **kwargs):
+            return orjson.loads(s)
+
+    _JSON_IMPL = _OrjsonAdapter
+except ImportError:
+    _JSON_IMPL = json
 
 # 配置信息
 SERVER_URL = "https://aa.bdmc.live:9753"  # 更改為您的伺服器地址
@@ -26,530 +51,636 @@ MAIN_SCRIPT_PATH = "bot start.py"      # 主排程腳本路徑
 REMOVE_SCRIPT_PATH = "remove_job.py"        # 移除任務腳本路徑
 BOT_CHAT_PATH = "bot_chat.py"               # 聊天腳本路徑
 
+# 支持的命令列表（於認證時上報伺服器）
+REGISTERED_COMMANDS = [
+    # 系統控制命令
+    "pause system",        # 暫停系統
+    "resume system",       # 恢復系統
+    "restart system",      # 重啟系統
+    "restart game",        # 重啟遊戲
+    "reset scheduler",     # 重置排程
+    "refresh detection",   # 刷新檢測
+
+    # 職位管理命令
+    "enable position1",    # 啟用職位1
+    "enable position2",    # 啟用職位2
+    "enable position3",    # 啟用職位3
+    "enable position4",    # 啟用職位4
+    "enable position5",    # 啟用職位5
+    "enable position6",    # 啟用職位6
+    "disable position1",   # 禁用職位1
+    "disable position2",   # 禁用職位2
+    "disable position3",   # 禁用職位3
+    "disable position4",   # 禁用職位4
+    "disable position5",   # 禁用職位5
+    "disable position6",   # 禁用職位6
+
+    # 特殊命令
+    "remove",              # 罷黜特定ID的職位
+    "say:",                # 發送聊天訊息
+
+    # 兼容舊版命令
+    "restart wolf",        # 舊版重啟遊戲命令
+    "restart",             # 舊版重啟遊戲命令
+    "restart bot",         # 舊版重啟系統命令
+    "reset"                # 舊版重置排程命令
+]
+
+# 預編譯的命令參數解析規則
+_POSITION_NUM_RE = re.compile(r"\s*(\d+)\s*$")  # "enable position"/"disable position"後的編號
+
+# 命令結果合併發送的等待窗口（秒）：窗口內到達的結果併為一次emit
+RESULT_COALESCE_WINDOW = 0.05
+
+
+class ClientState(Enum):
+    """客戶端連接狀態"""
+    DISCONNECTED = 0   # 未連接
+    CONNECTED = 1      # 已連接、尚未通過認證
+    AUTHENTICATED = 2  # 已連接且認證成功
+
+# 控制信號位定義：以單一整數的位元組合取代多個threading.Event
+SIGNAL_SYSTEM_PAUSE = 1 << 0       # 暫停系統
+SIGNAL_SYSTEM_RESUME = 1 << 1      # 恢復系統
+SIGNAL_RESTART_SYSTEM = 1 << 2     # 重啟整個系統
+SIGNAL_RESTART_GAME = 1 << 3       # 僅重啟遊戲
+SIGNAL_RESET_SCHEDULER = 1 << 4    # 重置排程
+SIGNAL_REFRESH_DETECTION = 1 << 5  # 刷新檢測
+
+# 職位切換的日誌與回覆訊息組合固定（6個職位×啟用/禁用），預先格式化
+_POSITION_TOGGLE_MESSAGES = {
+    (f"position_{n}", enable): (
+        f"切換職位 position_{n} 狀態為 {'啟用' if enable else '禁用'}",
+        f"已設置職位 position_{n} 為 {'啟用' if enable else '禁用'}",
+    )
+    for n in range(1, 7)
+    for enable in (True, False)
+}
+
 # 設置日誌
 log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("ControlClient")
 logger.setLevel(logging.INFO)
 
-# 添加控制台處理器
+# 控制台處理器
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(log_formatter)
-logger.addHandler(console_handler)
 
-# 添加文件處理器
+# 文件處理器
 file_handler = RotatingFileHandler(
     "control_client.log",
     maxBytes=10 * 1024 * 1024,  # 10 MB
     backupCount=3
 )
 file_handler.setFormatter(log_formatter)
-logger.addHandler(file_handler)
+
+# 日誌經由佇列轉交背景監聽線程寫出，記錄方不會被磁碟/終端I/O阻塞
+_log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(
+    _log_queue, console_handler, file_handler, respect_handler_level=True
+)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 class ControlClient:
-    """控制客戶端類"""
-    
+    """控制客戶端類
+
+    基於 socketio.AsyncClient，在單一 asyncio 事件循環中運行，
+    不再需要每秒喚醒的輪詢線程；重連由 socketio 自動處理。
+    信號檢查方法（check_*）仍可由引擎線程安全調用。
+    """
+
     def __init__(self, server_url, client_key):
         """初始化控制客戶端"""
         self.server_url = server_url
         self.client_key = client_key
-        
-        # 註冊支持的命令
-        self.registered_commands = [
-            # 系統控制命令
-            "pause system",        # 暫停系統
-            "resume system",       # 恢復系統
-            "restart system",      # 重啟系統
-            "restart game",        # 重啟遊戲
-            "reset scheduler",     # 重置排程
-            "refresh detection",   # 刷新檢測
-            
-            # 職位管理命令
-            "enable position1",    # 啟用職位1
-            "enable position2",    # 啟用職位2
-            "enable position3",    # 啟用職位3
-            "enable position4",    # 啟用職位4
-            "enable position5",    # 啟用職位5
-            "enable position6",    # 啟用職位6
-            "disable position1",   # 禁用職位1
-            "disable position2",   # 禁用職位2
-            "disable position3",   # 禁用職位3
-            "disable position4",   # 禁用職位4
-            "disable position5",   # 禁用職位5
-            "disable position6",   # 禁用職位6
-            
-            # 特殊命令
-            "remove",              # 罷黜特定ID的職位
-            "say:",                # 發送聊天訊息
-            
-            # 兼容舊版命令
-            "restart wolf",        # 舊版重啟遊戲命令
-            "restart",             # 舊版重啟遊戲命令
-            "restart bot",         # 舊版重啟系統命令
-            "reset"                # 舊版重置排程命令
-        ]
-        
-        # 創建事件，用於通知主腳本各種控制信號
-        self.system_pause_event = threading.Event()
-        self.system_resume_event = threading.Event()
-        self.restart_system_event = threading.Event()  # 重啟整個系統
-        self.restart_game_event = threading.Event()    # 僅重啟遊戲
-        self.reset_scheduler_event = threading.Event() # 重置排程
-        self.refresh_detection_event = threading.Event() # 刷新檢測
-        
-        # 職位控制信息
-        self.position_control = {"active": False, "position_id": None, "enable": False}
-        
-        # 移除任務信息
-        self.remove_job_info = {"active": False, "job_id": None}
-        
-        # 聊天信息
-        self.chat_info = {"active": False, "content": None}
-        
-        # 創建Socket.IO客戶端
-        self.sio = socketio.Client(ssl_verify=False)
-        
+
+        # 註冊支持的命令（模組級常量，所有實例共用）
+        self.registered_commands = REGISTERED_COMMANDS
+
+        # 控制信號：單一位元字加一把鎖，取代每信號一個threading.Event
+        # 設置方在asyncio線程、檢查方在引擎線程
+        self._signal_flags = 0
+        self._signal_lock = threading.Lock()
+
+        # 帶數據的控制請求以線程安全佇列傳遞（設置方在asyncio線程、
+        # 消費方在引擎線程），連續命令不會互相覆蓋
+        self._position_control_queue = queue.SimpleQueue()  # (position_id, enable)
+        self._remove_job_queue = queue.SimpleQueue()        # job_id
+        self._chat_queue = queue.SimpleQueue()              # content
+
+        # Socket.IO客戶端與其共用的HTTP會話於_amain內（事件循環中）創建
+        self.sio = None
+        self._http_session = None
+
+        # 命令分派表：精確命令以dict做O(1)查找
+        self._command_handlers = {
+            "pause system": self._pause_system,
+            "resume system": self._resume_system,
+            "restart system": self._restart_system,
+            "restart bot": self._restart_system,
+            "restart game": self._restart_game,
+            "restart": self._restart_game,
+            "reset scheduler": self._reset_scheduler,
+            "reset": self._reset_scheduler,
+            "refresh detection": self._refresh_detection,
+        }
+
+        # 帶參數的命令以前綴匹配，處理函數接收前綴後的剩餘字串
+        # 以首字符分桶（單層trie），未知命令無須掃描整個前綴表
+        prefix_handlers = (
+            ("enable position", self._handle_enable_position),
+            ("disable position", self._handle_disable_position),
+            ("restart wolf", self._handle_restart_wolf),
+            ("remove ", self._handle_remove),
+            ("say:", self._handle_say),
+        )
+        self._prefix_buckets = {}
+        for prefix, handler in prefix_handlers:
+            self._prefix_buckets.setdefault(prefix[0], []).append((prefix, handler))
+
+        # 連接狀態
+        self.state = ClientState.DISCONNECTED
+        self.should_exit = False
+        self.client_thread = None
+        self._loop = None  # 客戶端所屬的事件循環（_amain啟動時設置）
+        self._shutdown = None  # asyncio.Event，於_amain啟動時在所屬循環內創建
+        self._auth_failed = False  # 本次連接是否因認證失敗而斷開
+
+        # 命令結果緩衝：短窗口內的多筆結果合併為一次發送
+        self._result_buffer = []
+        self._flush_task = None
+
+    def _create_client(self):
+        """創建Socket.IO客戶端與共用的HTTP會話（須於事件循環內調用）
+
+        所有連接（含重連）共用同一個aiohttp會話與其連接池，
+        避免每次重連都重新建立TCP/TLS連線。
+        """
+        self._http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=False, limit=4, keepalive_timeout=75)
+        )
+        self.sio = socketio.AsyncClient(
+            http_session=self._http_session,
+            reconnection=True,
+            reconnection_delay=5,
+            json=_JSON_IMPL
+        )
+
         # 註冊事件處理
         self.sio.on('connect', self._on_connect)
         self.sio.on('disconnect', self._on_disconnect)
         self.sio.on('authenticated', self._on_authenticated)
         self.sio.on('command', self._on_command)
-        
-        # 連接狀態
-        self.connected = False
-        self.authenticated = False
-        self.should_exit = False
-    
-    def start(self):
+
+    async def start(self):
         """開始連接伺服器"""
         try:
-            logger.info(f"正在連接到伺服器: {self.server_url}")
-            self.sio.connect(self.server_url)
+            logger.info("正在連接到伺服器: %s", self.server_url)
+            await self.sio.connect(self.server_url)
             return True
         except Exception as e:
-            logger.error(f"連接伺服器失敗: {str(e)}")
+            logger.error("連接伺服器失敗: %s", str(e))
             return False
-    
+
+    async def _astop(self):
+        """在事件循環內停止連接"""
+        if self.state is not ClientState.DISCONNECTED and self.sio is not None:
+            await self.sio.disconnect()
+        logger.info("客戶端已停止")
+
     def stop(self):
-        """停止連接"""
+        """停止連接（可由任意線程調用，立即喚醒等待中的重連迴圈）"""
         self.should_exit = True
-        if self.connected:
-            self.sio.disconnect()
-        logger.info("客戶端已停止")
-    
+        if self._loop is not None and self._loop.is_running():
+            if self._shutdown is not None:
+                self._loop.call_soon_threadsafe(self._shutdown.set)
+            asyncio.run_coroutine_threadsafe(self._astop(), self._loop)
+
+        # 等待客戶端線程收尾（非守護線程，設上限以免卡住關機流程）
+        if (self.client_thread is not None
+                and self.client_thread.is_alive()
+                and threading.current_thread() is not self.client_thread):
+            self.client_thread.join(timeout=5)
+
     def run_in_thread(self):
-        """在線程中運行客戶端"""
-        # 創建和啟動客戶端線程
-        self.client_thread = threading.Thread(target=self._run_forever)
-        self.client_thread.daemon = True  # 設置為守護線程
+        """在背景線程中運行客戶端的事件循環
+
+        線程為非守護線程：stop()會通知事件循環收尾並等待線程結束，
+        避免進程退出時強行切斷尚未送出的命令結果。
+        """
+        self.client_thread = threading.Thread(
+            target=lambda: asyncio.run(self._amain()),
+            name="ControlClient:asyncio",
+            daemon=False
+        )
         self.client_thread.start()
         logger.info("控制客戶端線程已啟動")
         return self.client_thread
-    
-    def _run_forever(self):
-        """在線程中持續運行"""
-        while not self.should_exit:
-            if not self.connected:
-                success = self.start()
-                if not success:
-                    logger.info("5秒後重試連接...")
-                    time.sleep(5)
+
+    def start_as_task(self, loop=None):
+        """將客戶端作為asyncio Task掛載到現有事件循環
+
+        宿主若本身運行asyncio（例如未來改為異步的主循環），
+        可直接共用其循環而不需要獨立線程。
+
+        Args:
+            loop: 目標事件循環；預設為當前運行中的循環
+
+        Returns:
+            asyncio.Task: 客戶端主協程的Task
+        """
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        return loop.create_task(self._amain(), name="ControlClient:amain")
+
+    async def _amain(self):
+        """客戶端主協程：連接後阻塞等待事件，不做輪詢
+
+        初次連接失敗時以指數退避重試（1s,2s,4s,...上限60s），
+        並在shutdown事件被設置時立即中斷等待。
+        """
+        self._loop = asyncio.get_running_loop()
+        self._shutdown = asyncio.Event()
+        self._create_client()
+        backoff = 1
+
+        try:
+            while not self._shutdown.is_set():
+                if not await self.start():
+                    logger.info("%d秒後重試連接...", backoff)
+                    try:
+                        await asyncio.wait_for(self._shutdown.wait(), timeout=backoff)
+                    except asyncio.TimeoutError:
+                        pass
+                    backoff = min(backoff * 2, 60)
                     continue
-            
-            # 防止線程結束
-            try:
-                time.sleep(1)
-            except (KeyboardInterrupt, SystemExit):
-                logger.info("收到退出信號")
-                self.stop()
-                break
-    
-    def _on_connect(self):
+
+                # 斷線重連由socketio處理，這裡只需等待直到disconnect
+                await self.sio.wait()
+
+                if self._auth_failed:
+                    # 認證被伺服器拒絕：與連接失敗一樣按指數退避重連，
+                    # 避免在認證持續失敗時形成零間隔的熱重連循環
+                    self._auth_failed = False
+                    logger.info("認證失敗，%d秒後重試連接...", backoff)
+                    try:
+                        await asyncio.wait_for(self._shutdown.wait(), timeout=backoff)
+                    except asyncio.TimeoutError:
+                        pass
+                    backoff = min(backoff * 2, 60)
+                else:
+                    # 正常運行過的連接斷開後從最短退避重新開始
+                    backoff = 1
+        finally:
+            await self._http_session.close()
+
+    async def _on_connect(self):
         """連接成功的回調"""
-        self.connected = True
+        self.state = ClientState.CONNECTED
         logger.info("已連接到伺服器")
-        
+
         # 發送認證
-        self.sio.emit('authenticate', {
+        await self.sio.emit('authenticate', {
             'type': 'client',
             'clientKey': self.client_key,
             'commands': self.registered_commands
         })
-    
-    def _on_disconnect(self):
+
+    async def _on_disconnect(self):
         """斷開連接的回調"""
-        self.connected = False
-        self.authenticated = False
+        self.state = ClientState.DISCONNECTED
         logger.info("已與伺服器斷開連接")
-    
-    def _on_authenticated(self, data):
+
+    async def _on_authenticated(self, data):
         """認證結果的回調"""
         if data.get('success'):
-            if not self.authenticated:  # 避免重複日誌
-                self.authenticated = True
+            if self.state is not ClientState.AUTHENTICATED:  # 避免重複日誌
+                self.state = ClientState.AUTHENTICATED
                 logger.info("認證成功")
         else:
-            self.authenticated = False
-            logger.error(f"認證失敗: {data.get('error', '未知錯誤')}")
-            # 斷開並稍後重連
-            self.sio.disconnect()
-    
-    def _on_command(self, data):
+            self.state = ClientState.CONNECTED
+            logger.error("認證失敗: %s", data.get('error', '未知錯誤'))
+            # 標記後斷開，_amain會按退避時間延後重連
+            self._auth_failed = True
+            await self.sio.disconnect()
+
+    async def _on_command(self, data):
         """接收到命令的回調"""
         command = data.get('command', '')
         params = data.get('params', {})
         from_user = data.get('from', 'unknown')
-        
-        logger.info(f"收到來自 {from_user} 的命令: {command}")
-        
+
+        # 熱路徑：先檢查日誌級別再格式化，避免每條命令都付出格式化成本
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("收到來自 %s 的命令: %s", from_user, command)
+
         # 處理命令
         try:
-            # 暫停系統
-            if command == "pause system":
-                result = self._pause_system()
-                self._send_command_result(command, True, result)
-            
-            # 恢復系統
-            elif command == "resume system":
-                result = self._resume_system()
-                self._send_command_result(command, True, result)
-            
-            # 重啟系統
-            elif command == "restart system" or command == "restart bot":
-                result = self._restart_system()
-                self._send_command_result(command, True, result)
-            
-            # 重啟遊戲
-            elif command == "restart game" or command.startswith("restart wolf") or command == "restart":
-                result = self._restart_game()
-                self._send_command_result(command, True, result)
-            
-            # 重置排程
-            elif command == "reset scheduler" or command == "reset":
-                result = self._reset_scheduler()
-                self._send_command_result(command, True, result)
-            
-            # 刷新檢測
-            elif command == "refresh detection":
-                result = self._refresh_detection()
-                self._send_command_result(command, True, result)
-            
-            # 啟用職位
-            elif command.startswith("enable position"):
-                try:
-                    position_num = int(command.replace("enable position", "").strip())
-                    if 1 <= position_num <= 6:
-                        result = self._toggle_position(f"position_{position_num}", True)
-                        self._send_command_result(command, True, result)
-                    else:
-                        self._send_command_result(command, False, "無效的職位編號")
-                except ValueError:
-                    self._send_command_result(command, False, "無效的職位編號格式")
-            
-            # 禁用職位
-            elif command.startswith("disable position"):
-                try:
-                    position_num = int(command.replace("disable position", "").strip())
-                    if 1 <= position_num <= 6:
-                        result = self._toggle_position(f"position_{position_num}", False)
-                        self._send_command_result(command, True, result)
-                    else:
-                        self._send_command_result(command, False, "無效的職位編號")
-                except ValueError:
-                    self._send_command_result(command, False, "無效的職位編號格式")
-            
-            # 罷黜職位
-            elif command.startswith("remove "):
-                # 提取ID
-                try:
-                    job_id = command.split("remove ")[1].strip()
-                    result = self._remove_job(job_id)
-                    self._send_command_result(command, True, result)
-                except IndexError:
-                    self._send_command_result(command, False, "缺少任務ID")
-            
-            # 發送聊天
-            elif command.startswith("say:"):
-                # 提取聊天內容
-                try:
-                    content = command[4:].strip()  # 去除"say:"前綴和空白
-                    if content:
-                        result = self._send_chat(content)
-                        self._send_command_result(command, True, result)
-                    else:
-                        self._send_command_result(command, False, "聊天內容不能為空")
-                except Exception as e:
-                    self._send_command_result(command, False, f"處理聊天命令時出錯: {str(e)}")
-            
-            else:
-                self._send_command_result(command, False, "未知命令")
-        
+            # 精確命令：O(1)查表
+            handler = self._command_handlers.get(command)
+            if handler is not None:
+                result = handler()
+                await self._send_command_result(command, True, result)
+                return
+
+            # 帶參數命令：按首字符分桶後再做前綴匹配
+            for prefix, prefix_handler in self._prefix_buckets.get(command[:1], ()):
+                if command.startswith(prefix):
+                    success, message = prefix_handler(command[len(prefix):])
+                    await self._send_command_result(command, success, message)
+                    return
+
+            await self._send_command_result(command, False, "未知命令")
+
         except Exception as e:
-            logger.exception(f"執行命令 {command} 時出錯")
-            self._send_command_result(command, False, f"執行錯誤: {str(e)}")
-    
-    def _send_command_result(self, command, success, message):
-        """發送命令執行結果到伺服器"""
-        if self.connected and self.authenticated:
-            self.sio.emit('commandResult', {
-                'command': command,
-                'success': success,
-                'message': message,
-                'timestamp': time.time()
-            })
-    
+            logger.exception("執行命令 %s 時出錯", command)
+            await self._send_command_result(command, False, f"執行錯誤: {str(e)}")
+
+    # 前綴命令處理函數（接收前綴後的剩餘字串，返回 (success, message)）
+
+    def _handle_enable_position(self, rest):
+        """處理啟用職位命令"""
+        return self._handle_toggle_position(rest, True)
+
+    def _handle_disable_position(self, rest):
+        """處理禁用職位命令"""
+        return self._handle_toggle_position(rest, False)
+
+    def _handle_toggle_position(self, rest, enable):
+        """解析職位編號並切換狀態"""
+        match = _POSITION_NUM_RE.match(rest)
+        if match is None:
+            return (False, "無效的職位編號格式")
+
+        position_num = int(match.group(1))
+        if 1 <= position_num <= 6:
+            return (True, self._toggle_position(f"position_{position_num}", enable))
+        return (False, "無效的職位編號")
+
+    def _handle_restart_wolf(self, rest):
+        """處理舊版重啟遊戲命令"""
+        return (True, self._restart_game())
+
+    def _handle_remove(self, rest):
+        """處理移除任務命令"""
+        job_id = rest.strip()
+        if not job_id:
+            return (False, "缺少任務ID")
+        return (True, self._remove_job(job_id))
+
+    def _handle_say(self, rest):
+        """處理聊天命令"""
+        content = rest.strip()
+        if content:
+            return (True, self._send_chat(content))
+        return (False, "聊天內容不能為空")
+
+    async def _send_command_result(self, command, success, message):
+        """將命令執行結果排入緩衝，於合併窗口後發送到伺服器"""
+        if self.state is not ClientState.AUTHENTICATED:
+            return
+
+        self._result_buffer.append({
+            'command': command,
+            'success': success,
+            'message': message,
+            'timestamp': time.time()
+        })
+
+        # 窗口內僅保留一個待執行的發送任務
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_results()
+            )
+
+    async def _flush_results(self):
+        """等待合併窗口後一次送出緩衝中的所有命令結果"""
+        await asyncio.sleep(RESULT_COALESCE_WINDOW)
+
+        pending, self._result_buffer = self._result_buffer, []
+        if not pending or self.state is not ClientState.AUTHENTICATED:
+            return
+
+        if len(pending) == 1:
+            # 單筆結果沿用既有的事件格式
+            await self.sio.emit('commandResult', pending[0])
+        else:
+            await self.sio.emit('commandResults', pending)
+
+    # 信號位操作
+
+    def _set_signal(self, bit):
+        """設置指定的控制信號位"""
+        with self._signal_lock:
+            self._signal_flags |= bit
+
+    def _consume_signal(self, bit):
+        """檢查並清除指定的控制信號位
+
+        Returns:
+            bool: 信號是否已被設置
+        """
+        with self._signal_lock:
+            if self._signal_flags & bit:
+                self._signal_flags &= ~bit
+                return True
+            return False
+
     # 命令處理函數
-    
+
     def _pause_system(self):
         """暫停系統"""
         logger.info("設置系統暫停信號")
-        self.system_pause_event.set()
+        self._set_signal(SIGNAL_SYSTEM_PAUSE)
         return "已設置系統暫停信號"
-    
+
     def _resume_system(self):
         """恢復系統"""
         logger.info("設置系統恢復信號")
-        self.system_resume_event.set()
+        self._set_signal(SIGNAL_SYSTEM_RESUME)
         return "已設置系統恢復信號"
-    
+
     def _restart_system(self):
         """重啟整個系統"""
         logger.info("設置系統重啟信號")
-        self.restart_system_event.set()
+        self._set_signal(SIGNAL_RESTART_SYSTEM)
         return "已設置系統重啟信號"
-    
+
     def _restart_game(self):
         """重啟遊戲"""
-        try:
-            logger.info("重啟遊戲")
-            
-            # 設置遊戲重啟信號
-            self.restart_game_event.set()
-            
-            return "已設置遊戲重啟信號"
-        except Exception as e:
-            logger.exception("重啟遊戲時出錯")
-            return f"重啟遊戲時出錯: {str(e)}"
-    
+        logger.info("設置遊戲重啟信號")
+        self._set_signal(SIGNAL_RESTART_GAME)
+        return "已設置遊戲重啟信號"
+
     def _reset_scheduler(self):
         """重置排程器"""
         logger.info("設置排程重置信號")
-        self.reset_scheduler_event.set()
+        self._set_signal(SIGNAL_RESET_SCHEDULER)
         return "已設置排程重置信號"
-    
+
     def _refresh_detection(self):
         """刷新檢測"""
         logger.info("設置刷新檢測信號")
-        self.refresh_detection_event.set()
+        self._set_signal(SIGNAL_REFRESH_DETECTION)
         return "已設置刷新檢測信號"
-    
+
     def _toggle_position(self, position_id, enable):
         """切換職位啟用/禁用狀態
-        
+
         Args:
             position_id (str): 職位ID
             enable (bool): 是否啟用
         """
-        try:
-            logger.info(f"切換職位 {position_id} 狀態為 {'啟用' if enable else '禁用'}")
-            
-            # 設置職位控制信息
-            self.position_control["active"] = True
-            self.position_control["position_id"] = position_id
-            self.position_control["enable"] = enable
-            
-            return f"已設置職位 {position_id} 為 {'啟用' if enable else '禁用'}"
-        except Exception as e:
-            logger.exception("切換職位狀態時出錯")
-            return f"切換職位狀態時出錯: {str(e)}"
-    
+        log_message, result_message = _POSITION_TOGGLE_MESSAGES[(position_id, enable)]
+        logger.info(log_message)
+
+        # 設置職位控制信息
+        self._position_control_queue.put((position_id, enable))
+
+        return result_message
+
     def _remove_job(self, job_id):
         """紀錄任務ID，設置移除信號
-        
+
         Args:
             job_id (str): 任務ID
         """
-        try:
-            logger.info(f"處理移除任務: {job_id}")
-            
-            # 設置移除任務信息
-            self.remove_job_info["active"] = True
-            self.remove_job_info["job_id"] = job_id
-            
-            return f"已設置移除任務信號，ID: {job_id}"
-        except Exception as e:
-            logger.exception("設置移除任務時出錯")
-            return f"設置移除任務時出錯: {str(e)}"
-    
+        logger.info("處理移除任務: %s", job_id)
+
+        # 設置移除任務信息
+        self._remove_job_queue.put(job_id)
+
+        return f"已設置移除任務信號，ID: {job_id}"
+
     def _send_chat(self, content):
         """紀錄聊天內容，設置聊天信號
-        
+
         Args:
             content (str): 聊天內容
         """
-        try:
-            logger.info(f"處理聊天命令: {content}")
-            
-            # 設置聊天信息
-            self.chat_info["active"] = True
-            self.chat_info["content"] = content
-            
-            return f"已設置聊天信號，內容: '{content}'"
-        except Exception as e:
-            logger.exception("設置聊天命令時出錯")
-            return f"設置聊天命令時出錯: {str(e)}"
-    
+        logger.info("處理聊天命令: %s", content)
+
+        # 設置聊天信息
+        self._chat_queue.put(content)
+
+        return f"已設置聊天信號，內容: '{content}'"
+
     # 信號檢查方法（供主腳本調用）
-    
+
     def check_system_pause(self):
         """檢查是否有系統暫停信號"""
-        if self.system_pause_event.is_set():
-            self.system_pause_event.clear()
-            return True
-        return False
-    
+        return self._consume_signal(SIGNAL_SYSTEM_PAUSE)
+
     def check_system_resume(self):
         """檢查是否有系統恢復信號"""
-        if self.system_resume_event.is_set():
-            self.system_resume_event.clear()
-            return True
-        return False
-    
+        return self._consume_signal(SIGNAL_SYSTEM_RESUME)
+
     def check_restart_system(self):
         """檢查是否有系統重啟信號"""
-        if self.restart_system_event.is_set():
-            self.restart_system_event.clear()
-            return True
-        return False
-    
+        return self._consume_signal(SIGNAL_RESTART_SYSTEM)
+
     def check_restart_game(self):
         """檢查是否有遊戲重啟信號"""
-        if self.restart_game_event.is_set():
-            self.restart_game_event.clear()
-            return True
-        return False
-    
+        return self._consume_signal(SIGNAL_RESTART_GAME)
+
     def check_reset_scheduler(self):
         """檢查是否有排程重置信號"""
-        if self.reset_scheduler_event.is_set():
-            self.reset_scheduler_event.clear()
-            return True
-        return False
-    
+        return self._consume_signal(SIGNAL_RESET_SCHEDULER)
+
     def check_refresh_detection(self):
         """檢查是否有刷新檢測信號"""
-        if self.refresh_detection_event.is_set():
-            self.refresh_detection_event.clear()
-            return True
-        return False
-    
+        return self._consume_signal(SIGNAL_REFRESH_DETECTION)
+
     def check_position_control(self):
         """檢查是否有職位控制請求
-        
+
         Returns:
             tuple: (position_id, enable) 如果有控制請求，否則返回 (None, None)
         """
-        if self.position_control["active"]:
-            position_id = self.position_control["position_id"]
-            enable = self.position_control["enable"]
-            
-            # 重置控制信息
-            self.position_control["active"] = False
-            self.position_control["position_id"] = None
-            self.position_control["enable"] = False
-            
-            return (position_id, enable)
-        
-        return (None, None)
-    
+        try:
+            return self._position_control_queue.get_nowait()
+        except queue.Empty:
+            return (None, None)
+
     def check_remove_job(self):
         """檢查是否有移除任務請求
-        
+
         Returns:
             str: 任務ID，如果沒有則返回None
         """
-        if self.remove_job_info["active"]:
-            job_id = self.remove_job_info["job_id"]
-            
-            # 重置控制信息
-            self.remove_job_info["active"] = False
-            self.remove_job_info["job_id"] = None
-            
-            return job_id
-        
-        return None
-    
+        try:
+            return self._remove_job_queue.get_nowait()
+        except queue.Empty:
+            return None
+
     def check_chat_request(self):
         """檢查是否有聊天請求
-        
+
         Returns:
             str: 聊天內容，如果沒有則返回None
         """
-        if self.chat_info["active"]:
-            content = self.chat_info["content"]
-            
-            # 重置控制信息
-            self.chat_info["active"] = False
-            self.chat_info["content"] = None
-            
-            return content
-        
-        return None
+        try:
+            return self._chat_queue.get_nowait()
+        except queue.Empty:
+            return None
 
 # 主程序
 if __name__ == "__main__":
     # 此部分僅用於獨立測試，實際使用時應由主腳本導入
     print("啟動控制客戶端 (測試模式)")
-    
+
     client = ControlClient(SERVER_URL, CLIENT_KEY)
-    
+
     # 註冊信號處理器
     def signal_handler(sig, frame):
         print("接收到退出信號，正在停止客戶端...")
         client.stop()
         sys.exit(0)
-    
+
     signal.signal(signal.SIGINT, signal_handler)
-    
+
     # 啟動客戶端
     try:
-        client.start()
+        client.run_in_thread()
         print("按Ctrl+C退出")
-        
+
         # 模擬主腳本循環
         while True:
             if client.check_system_pause():
                 print("收到系統暫停信號，應暫停系統")
-            
+
             if client.check_system_resume():
                 print("收到系統恢復信號，應恢復系統")
-            
+
             if client.check_restart_system():
                 print("收到系統重啟信號，應重啟系統")
-            
+
             if client.check_restart_game():
                 print("收到遊戲重啟信號，應重啟遊戲")
-            
+
             if client.check_reset_scheduler():
                 print("收到排程重置信號，應重置排程")
-            
+
             if client.check_refresh_detection():
                 print("收到刷新檢測信號，應刷新檢測")
-            
+
             position_control = client.check_position_control()
             if position_control[0]:
                 print(f"收到職位控制請求: {position_control[0]} -> {'啟用' if position_control[1] else '禁用'}")
-            
+
             job_id = client.check_remove_job()
             if job_id:
                 print(f"收到移除任務請求，ID: {job_id}")
-            
+
             chat_content = client.check_chat_request()
             if chat_content:
                 print(f"收到聊天請求，內容: '{chat_content}'")
-            
+
             time.sleep(1)
     except KeyboardInterrupt:
         print("程序中斷")
     finally:
         client.stop()
-        print("客戶端已停止")
\ No newline at end of file
+        print("客戶端已停止")
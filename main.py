@@ -22,6 +22,7 @@ import signal
 import traceback
 import argparse
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加當前目錄到搜索路徑
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -200,13 +201,17 @@ def main():
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
         
-        # 設置遠程控制
-        control_client = setup_control_client()
-        
-        # 設置UI界面
-        if not args.no_ui and UI_AVAILABLE:
-            ui_setup = setup_ui()
-        
+        # 並行設置遠程控制與UI界面（兩者互不依賴，縮短啟動時間）
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="setup") as executor:
+            control_future = executor.submit(setup_control_client)
+            ui_future = None
+            if not args.no_ui and UI_AVAILABLE:
+                ui_future = executor.submit(setup_ui)
+
+            control_client = control_future.result()
+            if ui_future is not None:
+                ui_setup = ui_future.result()
+
         # 啟動引擎
         engine.start()
     
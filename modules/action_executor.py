@@ -10,16 +10,37 @@ import time
 import random
 import logging
 import threading
+import queue
+import functools
+from contextlib import contextmanager
 from enum import Enum
 
-# 嘗試導入適用於遊戲的直接輸入庫，如果不可用則使用pyautogui
-try:
-    import pydirectinput as directinput
-    DIRECT_INPUT_AVAILABLE = True
-except ImportError:
-    DIRECT_INPUT_AVAILABLE = False
-    
-import pyautogui
+# 輸入庫（pydirectinput/pyautogui）導入成本高，
+# 延遲到首次建立執行器時才載入，讓模組本身可被低成本導入
+directinput = None
+pyautogui = None
+DIRECT_INPUT_AVAILABLE = False
+
+def _load_input_backends():
+    """延遲導入輸入後端
+
+    嘗試導入適用於遊戲的直接輸入庫，如果不可用則使用pyautogui。
+    """
+    global directinput, pyautogui, DIRECT_INPUT_AVAILABLE
+    if pyautogui is not None:
+        return
+
+    try:
+        import pydirectinput
+        directinput = pydirectinput
+        DIRECT_INPUT_AVAILABLE = True
+    except ImportError:
+        DIRECT_INPUT_AVAILABLE = False
+
+    import pyautogui as _pyautogui
+    pyautogui = _pyautogui
+
+from . import win_input
 
 class InputMode(Enum):
     """輸入模式枚舉"""
@@ -27,6 +48,40 @@ class InputMode(Enum):
     DIRECT = 1       # 使用DirectInput (遊戲優先)
     GUI = 2          # 使用PyAutoGUI (一般應用)
 
+class _ActionOp:
+    """輸入佇列中的單一動作操作"""
+    __slots__ = ('fn', 'args', 'kwargs', 'done', 'error', 'result')
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.done = threading.Event()
+        self.error = None
+        self.result = None
+
+    def run(self):
+        """執行操作並記錄結果或異常"""
+        try:
+            self.result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+def _queued(method):
+    """裝飾器：將動作方法交由輸入線程執行
+
+    呼叫端將操作排入佇列後阻塞至完成，異常原樣拋回，
+    對外語義與直接調用相同；多個來源線程（主循環、熱鍵、
+    遠程控制）之間不再爭用同一把鎖。
+    輸入線程內的再入調用直接執行，避免自我等待造成死鎖。
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._submit(method, (self,) + args, kwargs)
+    return wrapper
+
 class ActionExecutor:
     """動作執行器類，提供鍵盤滑鼠操作功能"""
     
@@ -38,12 +93,28 @@ class ActionExecutor:
         """
         self.config = config
         self.logger = logging.getLogger("ActionExecutor")
-        
+
+        # 首次建立執行器時才載入輸入後端
+        _load_input_backends()
+
         # 初始化狀態
         self.last_action_time = 0
         self.current_action = None
         self.is_running = True
         self.action_lock = threading.Lock()
+
+        # 速率限制：以單調時鐘（整數納秒）記錄下一次允許操作的時間點，
+        # 不受NTP/時區等系統時間跳變影響；等待時阻塞在停止事件上，
+        # shutdown可立即喚醒
+        self._next_action_ns = 0
+        self._stop_event = threading.Event()
+
+        # 動作經由單一輸入線程序列化執行，
+        # 鎖不再於多個來源線程間爭用（僅剩緊急停止路徑）
+        self._action_q = queue.Queue(maxsize=256)
+        self._worker_thread = threading.Thread(
+            target=self._input_worker, name="ActionWorker", daemon=True)
+        self._worker_thread.start()
         
         # 安全設置
         pyautogui.FAILSAFE = True  # 啟用故障安全（移動到屏幕邊緣可中斷）
@@ -57,55 +128,117 @@ class ActionExecutor:
             elif mode_str == 'GUI':
                 self.default_input_mode = InputMode.GUI
         
-        # 操作間最小延遲（秒）
+        # 預先摺疊默認模式為實際生效的模式：
+        # DIRECT在沒有任何直接輸入後端時等同GUI，
+        # 摺疊後各動作只需 mode or self._effective_default
+        if self.default_input_mode == InputMode.DIRECT and \
+                (DIRECT_INPUT_AVAILABLE or win_input.SENDINPUT_AVAILABLE):
+            self._effective_default = InputMode.DIRECT
+        else:
+            self._effective_default = InputMode.GUI
+
+        # 操作間最小延遲（秒），內部以整數納秒計算
         self.min_action_delay = config.get('action', {}).get('min_action_delay', 0.1)
+        self._min_delay_ns = int(self.min_action_delay * 1e9)
         
         self.logger.info("動作執行器初始化完成")
         if not DIRECT_INPUT_AVAILABLE and self.default_input_mode == InputMode.DIRECT:
             self.logger.warning("PyDirectInput不可用，將使用PyAutoGUI代替")
     
+    def _input_worker(self):
+        """輸入線程：依序取出並執行佇列中的動作"""
+        while True:
+            op = self._action_q.get()
+            if op is None:
+                self._action_q.task_done()
+                break
+            op.run()
+            self._action_q.task_done()
+
+    def _submit(self, fn, args, kwargs):
+        """將操作交給輸入線程執行並等待完成
+
+        Args:
+            fn: 要執行的函數
+            args (tuple): 位置參數
+            kwargs (dict): 關鍵字參數
+
+        Returns:
+            執行結果；執行器已關閉時返回None
+        """
+        # 輸入線程內的再入調用（如動作序列中的單一動作）直接執行
+        if threading.current_thread() is self._worker_thread:
+            return fn(*args, **kwargs)
+
+        if not self.is_running:
+            self.logger.warning("動作執行器已關閉，忽略動作請求")
+            return None
+
+        op = _ActionOp(fn, args, kwargs)
+        self._action_q.put(op)
+        op.done.wait()
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    @contextmanager
+    def _action_ctx(self, name, mode, error_label):
+        """動作執行樣板的上下文管理器
+
+        集中處理加鎖、最小間隔等待、當前動作記錄、
+        完成時間標記與錯誤日誌，各動作方法只保留實際的輸入分派。
+
+        Args:
+            name (str): 當前動作描述（記錄於current_action）
+            mode (InputMode, optional): 指定的輸入模式
+            error_label (str): 錯誤日誌中的操作名稱
+
+        Yields:
+            InputMode: 實際使用的輸入模式
+        """
+        with self.action_lock:
+            self._wait_for_min_delay()
+            self.current_action = name
+            try:
+                yield mode or self._effective_default
+                self._mark_action_done()
+            except Exception as e:
+                self.logger.error(f"{error_label}失敗: {str(e)}")
+                raise
+            finally:
+                self.current_action = None
+
+    @_queued
     def click_at(self, x, y, button='left', mode=None):
         """在指定位置點擊
-        
+
         Args:
             x (int): X坐標
             y (int): Y坐標
             button (str, optional): 按鍵 ('left', 'right', 'middle')
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"click_{button}_at_{x}_{y}"
-            self.logger.debug(f"點擊 {button} 於 ({x}, {y})")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    # 移動到位置
-                    directinput.moveTo(x, y)
-                    # 點擊
-                    if button == 'left':
-                        directinput.click(x, y)
-                    elif button == 'right':
-                        directinput.rightClick(x, y)
-                    elif button == 'middle':
-                        directinput.middleClick(x, y)
-                else:
-                    # 移動到位置
-                    pyautogui.moveTo(x, y)
-                    # 點擊
-                    pyautogui.click(x=x, y=y, button=button)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"點擊操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx(f"click_{button}_at_{x}_{y}", mode, "點擊操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"點擊 {button} 於 ({x}, {y})")
+
+            if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                # 移動到位置
+                directinput.moveTo(x, y)
+                # 點擊
+                if button == 'left':
+                    directinput.click(x, y)
+                elif button == 'right':
+                    directinput.rightClick(x, y)
+                elif button == 'middle':
+                    directinput.middleClick(x, y)
+            else:
+                # 移動到位置
+                pyautogui.moveTo(x, y)
+                # 點擊
+                pyautogui.click(x=x, y=y, button=button)
     
+    @_queued
     def double_click_at(self, x, y, button='left', mode=None):
         """在指定位置雙擊
         
@@ -115,41 +248,28 @@ class ActionExecutor:
             button (str, optional): 按鍵 ('left', 'right', 'middle')
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"double_click_{button}_at_{x}_{y}"
-            self.logger.debug(f"雙擊 {button} 於 ({x}, {y})")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    # DirectInput沒有內置雙擊，所以我們執行兩次點擊
-                    directinput.moveTo(x, y)
-                    if button == 'left':
-                        directinput.click(x, y)
-                        time.sleep(0.1)
-                        directinput.click(x, y)
-                    elif button == 'right':
-                        directinput.rightClick(x, y)
-                        time.sleep(0.1)
-                        directinput.rightClick(x, y)
-                    elif button == 'middle':
-                        directinput.middleClick(x, y)
-                        time.sleep(0.1)
-                        directinput.middleClick(x, y)
-                else:
-                    pyautogui.moveTo(x, y)
-                    pyautogui.doubleClick(x=x, y=y, button=button)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"雙擊操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx(f"double_click_{button}_at_{x}_{y}", mode, "雙擊操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"雙擊 {button} 於 ({x}, {y})")
+
+            if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                # DirectInput沒有內置雙擊，所以我們執行兩次點擊
+                directinput.moveTo(x, y)
+                if button == 'left':
+                    directinput.click(x, y)
+                    time.sleep(0.1)
+                    directinput.click(x, y)
+                elif button == 'right':
+                    directinput.rightClick(x, y)
+                    time.sleep(0.1)
+                    directinput.rightClick(x, y)
+                elif button == 'middle':
+                    directinput.middleClick(x, y)
+                    time.sleep(0.1)
+                    directinput.middleClick(x, y)
+            else:
+                pyautogui.moveTo(x, y)
+                pyautogui.doubleClick(x=x, y=y, button=button)
     
     def right_click_at(self, x, y, mode=None):
         """在指定位置右鍵點擊
@@ -161,6 +281,7 @@ class ActionExecutor:
         """
         self.click_at(x, y, button='right', mode=mode)
     
+    @_queued
     def move_to(self, x, y, mode=None):
         """移動到指定位置
         
@@ -169,28 +290,16 @@ class ActionExecutor:
             y (int): Y坐標
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"move_to_{x}_{y}"
-            self.logger.debug(f"移動到 ({x}, {y})")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    directinput.moveTo(x, y)
-                else:
-                    pyautogui.moveTo(x, y)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"移動操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx(f"move_to_{x}_{y}", mode, "移動操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"移動到 ({x}, {y})")
+
+            if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                directinput.moveTo(x, y)
+            else:
+                pyautogui.moveTo(x, y)
     
+    @_queued
     def key_press(self, key, mode=None):
         """按下按鍵
         
@@ -198,28 +307,20 @@ class ActionExecutor:
             key (str): 按鍵名稱
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"key_press_{key}"
-            self.logger.debug(f"按下按鍵 {key}")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    directinput.press(key)
-                else:
-                    pyautogui.press(key)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"按鍵操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx(f"key_press_{key}", mode, "按鍵操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"按下按鍵 {key}")
+
+            if input_mode == InputMode.DIRECT and win_input.supports_key(key):
+                # ctypes的SendInput在系統調用期間釋放GIL，
+                # 不經過pydirectinput的逐事件Python處理
+                win_input.send_key_events([(key, False), (key, True)])
+            elif input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                directinput.press(key)
+            else:
+                pyautogui.press(key)
     
+    @_queued
     def key_down(self, key, mode=None):
         """按住按鍵
         
@@ -227,28 +328,18 @@ class ActionExecutor:
             key (str): 按鍵名稱
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"key_down_{key}"
-            self.logger.debug(f"按住按鍵 {key}")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    directinput.keyDown(key)
-                else:
-                    pyautogui.keyDown(key)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"按住按鍵操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx(f"key_down_{key}", mode, "按住按鍵操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"按住按鍵 {key}")
+
+            if input_mode == InputMode.DIRECT and win_input.supports_key(key):
+                win_input.send_key_events([(key, False)])
+            elif input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                directinput.keyDown(key)
+            else:
+                pyautogui.keyDown(key)
     
+    @_queued
     def key_up(self, key, mode=None):
         """釋放按鍵
         
@@ -256,28 +347,18 @@ class ActionExecutor:
             key (str): 按鍵名稱
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"key_up_{key}"
-            self.logger.debug(f"釋放按鍵 {key}")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    directinput.keyUp(key)
-                else:
-                    pyautogui.keyUp(key)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"釋放按鍵操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx(f"key_up_{key}", mode, "釋放按鍵操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"釋放按鍵 {key}")
+
+            if input_mode == InputMode.DIRECT and win_input.supports_key(key):
+                win_input.send_key_events([(key, True)])
+            elif input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                directinput.keyUp(key)
+            else:
+                pyautogui.keyUp(key)
     
+    @_queued
     def type_string(self, text, interval=0.05, mode=None):
         """輸入文字
         
@@ -286,60 +367,130 @@ class ActionExecutor:
             interval (float, optional): 按鍵間隔(秒)
             mode (InputMode, optional): 輸入模式
         """
-        with self.action_lock:
-            self._wait_for_min_delay()
-            
-            self.current_action = f"type_string"
-            self.logger.debug(f"輸入文字: {text}")
-            
-            input_mode = self._determine_input_mode(mode)
-            
-            try:
-                if input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
-                    # DirectInput沒有內置的type功能，所以我們逐字輸入
-                    for char in text:
-                        directinput.press(char)
-                        time.sleep(interval)
-                else:
-                    pyautogui.write(text, interval=interval)
-                
-                self.last_action_time = time.time()
-                self.current_action = None
-                
-            except Exception as e:
-                self.logger.error(f"輸入文字操作失敗: {str(e)}")
-                self.current_action = None
-                raise
+        with self._action_ctx("type_string", mode, "輸入文字操作") as input_mode:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"輸入文字: {text}")
+
+            if input_mode == InputMode.DIRECT and \
+                    all(win_input.supports_key(char) for char in text):
+                # 將整串文字的按下/釋放掃描碼合併為單一SendInput調用，
+                # 事件由系統原子注入，無需逐字sleep
+                events = []
+                for char in text:
+                    events.append((char, False))
+                    events.append((char, True))
+                win_input.send_key_events(events)
+            elif input_mode == InputMode.DIRECT and DIRECT_INPUT_AVAILABLE:
+                # DirectInput沒有內置的type功能，所以我們逐字輸入
+                for char in text:
+                    directinput.press(char)
+                    time.sleep(interval)
+            else:
+                pyautogui.write(text, interval=interval)
     
+    @_queued
     def execute_action_sequence(self, actions):
         """執行動作序列
-        
+
+        連續的純按鍵動作會被合併為單一SendInput調用送出（僅限Windows
+        且按鍵有對應掃描碼），其餘動作逐一執行。
+
         Args:
             actions (list): 動作列表，每個動作是(function, args, kwargs)的元組
-        
+
         Returns:
             bool: 是否成功執行所有動作
         """
-        self.logger.debug(f"開始執行動作序列，共 {len(actions)} 個動作")
-        
-        for i, (func, args, kwargs) in enumerate(actions):
+        total = len(actions)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"開始執行動作序列，共 {total} 個動作")
+
+        i = 0
+        while i < total:
+            func, args, kwargs = actions[i]
+
+            # 嘗試向後收集可合併的連續按鍵動作
+            events = self._collect_key_events(func, args, kwargs)
+            if events is not None:
+                batch = list(events)
+                j = i + 1
+                while j < total:
+                    next_events = self._collect_key_events(*actions[j])
+                    if next_events is None:
+                        break
+                    batch.extend(next_events)
+                    j += 1
+
+                if j > i + 1 and self._execute_key_batch(batch):
+                    i = j
+                    continue
+
             try:
-                self.logger.debug(f"執行序列動作 {i+1}/{len(actions)}")
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"執行序列動作 {i+1}/{total}")
                 func(*args, **kwargs)
             except Exception as e:
-                self.logger.error(f"執行動作序列時失敗於步驟 {i+1}/{len(actions)}: {str(e)}")
+                self.logger.error(f"執行動作序列時失敗於步驟 {i+1}/{total}: {str(e)}")
                 return False
-        
+
+            i += 1
+
         self.logger.debug("動作序列執行完成")
         return True
+
+    def _collect_key_events(self, func, args, kwargs):
+        """將單一動作轉換為可批次送出的鍵盤事件
+
+        Args:
+            func: 動作函數
+            args: 位置參數
+            kwargs: 關鍵字參數
+
+        Returns:
+            list: (key, is_up)事件列表；動作不可批次時返回None
+        """
+        if kwargs or len(args) != 1:
+            return None
+
+        key = args[0]
+        if not win_input.supports_key(key):
+            return None
+
+        if func == self.key_press:
+            return [(key, False), (key, True)]
+        if func == self.key_down:
+            return [(key, False)]
+        if func == self.key_up:
+            return [(key, True)]
+        return None
+
+    def _execute_key_batch(self, events):
+        """以單一SendInput調用送出一組鍵盤事件
+
+        Args:
+            events (list): (key, is_up)事件列表
+
+        Returns:
+            bool: 是否成功送出
+        """
+        with self._action_ctx("key_batch", None, "批次按鍵操作"):
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"批次送出 {len(events)} 個鍵盤事件")
+
+            return win_input.send_key_events(events)
     
     def stop_all_actions(self):
         """停止所有動作"""
         with self.action_lock:
             self.logger.info("停止所有動作")
-            
+
             # 釋放所有可能被按住的鍵
             common_keys = ['shift', 'ctrl', 'alt', 'win', 'up', 'down', 'left', 'right']
+
+            # 優先以單一SendInput調用一次釋放全部按鍵
+            if win_input.send_key_events([(key, True) for key in common_keys]):
+                return
+
             for key in common_keys:
                 try:
                     if DIRECT_INPUT_AVAILABLE:
@@ -349,30 +500,25 @@ class ActionExecutor:
                     pass
     
     def _wait_for_min_delay(self):
-        """等待最小操作間隔"""
-        if self.min_action_delay > 0:
-            elapsed = time.time() - self.last_action_time
-            if elapsed < self.min_action_delay:
-                time.sleep(self.min_action_delay - elapsed)
-    
-    def _determine_input_mode(self, mode):
-        """決定使用哪種輸入模式
-        
-        Args:
-            mode (InputMode, optional): 指定的輸入模式
-        
-        Returns:
-            InputMode: 實際使用的輸入模式
+        """等待最小操作間隔
+
+        以單調時鐘（整數納秒）計算的截止時間取代每次的時間差運算，
+        不受系統時間跳變影響；等待阻塞在停止事件上，
+        關閉執行器時能立即中斷等待。
         """
-        # 如果指定了模式，則使用指定的模式
-        if mode is not None:
-            return mode
-        
-        # 否則使用默認模式
-        return self.default_input_mode
+        remaining_ns = self._next_action_ns - time.monotonic_ns()
+        if remaining_ns > 0:
+            self._stop_event.wait(remaining_ns / 1e9)
+
+    def _mark_action_done(self):
+        """記錄操作完成時間並推進下一次允許操作的截止時間"""
+        self.last_action_time = time.time()
+        self._next_action_ns = time.monotonic_ns() + self._min_delay_ns
     
     def shutdown(self):
         """關閉執行器"""
         self.logger.info("關閉動作執行器")
         self.is_running = False
+        self._stop_event.set()  # 喚醒正在等待最小間隔的操作
+        self._action_q.put(None)  # 哨兵值：讓輸入線程退出
         self.stop_all_actions()
\ No newline at end of file
@@ -9,11 +9,11 @@
 import os
 import sys
 import time
-import yaml
 import logging
-import traceback
+import threading
+import queue
 from enum import Enum
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # 自定義模組導入
 from .game_manager import GameProcessManager, GameStatus
@@ -40,7 +40,16 @@ class CoreEngine:
         self.is_running = False
         self.is_paused = False
         self.start_time = None
+        self._start_ns = None  # 單調時鐘啟動時間（納秒），用於運行時長計算
         self.control_client = None  # 遠程控制客戶端
+        self.latest_screen_image = None  # 本輪主循環共用的屏幕截圖
+
+        # 主循環的等待條件：外部事件（暫停/恢復/關閉）可立即喚醒等待
+        self._wake_condition = threading.Condition()
+
+        # 遠程控制信號由背景線程輪詢後排入佇列，主循環只做非阻塞消費
+        self._remote_signal_queue = queue.SimpleQueue()
+        self._remote_poll_thread = None
         
         # 初始化日誌系統
         self._init_logger()
@@ -52,25 +61,49 @@ class CoreEngine:
         
         self.logger.info("核心引擎初始化完成")
     
+    # 配置文件必須提供的頂層區塊
+    _REQUIRED_CONFIG_SECTIONS = ('core', 'game', 'image_detection', 'positions', 'tasks')
+
     def _load_config(self, config_path):
         """載入配置文件
-        
+
+        優先使用libyaml的C解析器（CSafeLoader），
+        並在載入時一次性驗證必要區塊，之後各模組可直接取值。
+
         Args:
             config_path (str): 配置文件路徑
-            
+
         Returns:
             dict: 配置字典
         """
+        import yaml
+
+        # libyaml未編譯進PyYAML時退回純Python解析器
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
         try:
             with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=loader)
+
+            if not isinstance(config, dict):
+                raise ValueError("配置文件格式錯誤：頂層必須為映射")
+
+            missing = [s for s in self._REQUIRED_CONFIG_SECTIONS if s not in config]
+            if missing:
+                raise ValueError(f"配置文件缺少必要區塊: {', '.join(missing)}")
+
             return config
         except Exception as e:
             print(f"載入配置文件失敗: {str(e)}")
             raise
     
     def _init_logger(self):
-        """初始化日誌系統"""
+        """初始化日誌系統
+
+        日誌記錄經由QueueHandler排入佇列，
+        控制台與文件I/O由QueueListener的背景線程處理，
+        主循環與動作線程上的logger調用不會被磁盤寫入阻塞。
+        """
         log_level = getattr(logging, self.config['core']['log_level'])
         
         # 確保日誌目錄存在
@@ -84,13 +117,12 @@ class CoreEngine:
         root_logger = logging.getLogger()
         root_logger.setLevel(log_level)
         
-        # 添加控制台處理器
+        # 控制台處理器
         console_handler = logging.StreamHandler()
         console_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         console_handler.setFormatter(console_formatter)
-        root_logger.addHandler(console_handler)
         
-        # 添加文件處理器
+        # 文件處理器
         file_handler = RotatingFileHandler(
             log_file,
             maxBytes=10 * 1024 * 1024,  # 10 MB
@@ -99,16 +131,23 @@ class CoreEngine:
         )
         file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(file_formatter)
-        root_logger.addHandler(file_handler)
+
+        # 實際I/O處理器掛在監聽器後面，根日誌只負責入隊
+        log_queue = queue.SimpleQueue()
+        root_logger.addHandler(QueueHandler(log_queue))
+        self._log_listener = QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True)
+        self._log_listener.start()
     
     def _init_modules(self):
         """初始化所有系統模組"""
-        # 遊戲進程管理
-        self.modules['game_manager'] = GameProcessManager(self.config)
-        
         # 視窗管理
         self.modules['window_manager'] = WindowManager(self.config)
         
+        # 遊戲進程管理（共用引擎的視窗管理器，重啟遊戲時不另建實例）
+        self.modules['game_manager'] = GameProcessManager(
+            self.config, window_manager=self.modules['window_manager'])
+        
         # 圖像識別
         self.modules['image_detector'] = ImageDetector(self.config)
         
@@ -118,8 +157,9 @@ class CoreEngine:
         # 監控管理器
         self.modules['monitor_manager'] = MonitorManager()
         
-        # 任務排程器
+        # 任務排程器（到期時間變化時喚醒主循環，立即重新評估）
         self.modules['task_scheduler'] = TaskScheduler()
+        self.modules['task_scheduler'].set_wake_callback(self.wake)
         
         # 職位管理器
         self.modules['position_manager'] = PositionManager(
@@ -151,10 +191,17 @@ class CoreEngine:
     
     def _setup_scheduled_tasks(self):
         """設置排程任務"""
+        from functools import partial
+
         # 使用新的職位任務處理模組
         from tasks.process_positions_task import process_positions_task, check_overtime_task
-        
+
         task_scheduler = self.modules['task_scheduler']
+
+        # 以partial取代lambda綁定任務函數：
+        # 走C層調用路徑，每次執行少一層Python閉包調用
+        run_process_positions = partial(process_positions_task, self)
+        run_check_overtime = partial(check_overtime_task, self)
         
         # 處理申請任務
         if self.config['tasks']['process_applications']['enabled']:
@@ -167,7 +214,7 @@ class CoreEngine:
                     name="處理職位申請",
                     priority=80,
                     interval_seconds=process_interval_seconds,
-                    action=lambda: process_positions_task(self)
+                    action=run_process_positions
                 )
             else:
                 task_scheduler.add_task(
@@ -175,7 +222,7 @@ class CoreEngine:
                     name="處理職位申請",
                     priority=80,
                     interval_minutes=process_interval,
-                    action=lambda: process_positions_task(self)
+                    action=run_process_positions
                 )
         
         # 檢查超時任務
@@ -189,7 +236,7 @@ class CoreEngine:
                     name="檢查超時職位",
                     priority=70,
                     interval_seconds=overtime_interval_seconds,
-                    action=lambda: check_overtime_task(self)
+                    action=run_check_overtime
                 )
             else:
                 task_scheduler.add_task(
@@ -197,22 +244,45 @@ class CoreEngine:
                     name="檢查超時職位",
                     priority=70,
                     interval_minutes=overtime_interval_minutes,
-                    action=lambda: check_overtime_task(self)
+                    action=run_check_overtime
                 )
     
+    def get_runtime_seconds(self):
+        """獲取系統已運行的秒數
+
+        以單調時鐘計算，不受系統時間調整影響。
+
+        Returns:
+            float: 運行秒數，系統未啟動時返回None
+        """
+        if self._start_ns is None:
+            return None
+        return (time.monotonic_ns() - self._start_ns) / 1e9
+
     def start(self):
         """啟動系統主循環"""
         self.is_running = True
         self.start_time = time.time()
+        self._start_ns = time.monotonic_ns()
         self.logger.info("系統啟動中...")
         
         try:
+            # 啟動遠程控制信號輪詢線程
+            if self.control_client:
+                self._remote_poll_thread = threading.Thread(
+                    target=self._remote_poll_loop,
+                    name="RemoteSignalPoller",
+                    daemon=True
+                )
+                self._remote_poll_thread.start()
+
             # 檢查並啟動遊戲
             self._ensure_game_running()
-            
+
             # 啟動主循環
             self._main_loop()
         except Exception as e:
+            import traceback
             self.logger.critical(f"主循環出現致命錯誤: {str(e)}")
             self.logger.critical(traceback.format_exc())
         finally:
@@ -231,45 +301,82 @@ class CoreEngine:
             game_manager.restart_game()
     
     def _main_loop(self):
-        """主循環"""
+        """主循環
+
+        模組引用與常用方法在進入循環前提升為局部變量，
+        每輪省去modules字典與屬性鏈的重複查找。
+        """
         self.logger.info("主循環開始")
-        
+
+        # 循環內的熱路徑引用提升為局部變量
+        game_manager = self.modules['game_manager']
+        image_detector = self.modules['image_detector']
+        monitor_manager = self.modules['monitor_manager']
+        task_scheduler = self.modules['task_scheduler']
+        wake_condition = self._wake_condition
+
         while self.is_running:
             try:
                 # 檢查遊戲狀態
-                game_status = self.modules['game_manager'].check_game_status()
+                game_status = game_manager.check_game_status()
                 self._handle_game_status(game_status)
                 
-                # 如果系統被暫停，則跳過處理
+                # 如果系統被暫停，則跳過處理（resume可立即喚醒）
                 if self.is_paused:
-                    time.sleep(0.5)
+                    with wake_condition:
+                        wake_condition.wait(0.5)
                     continue
                 
-                # 檢查遠程控制信號
-                if self.control_client:
-                    self._check_remote_control_signals()
+                # 處理遠程控制信號（由背景線程輪詢後排入佇列）
+                self._drain_remote_signals()
                 
                 # 確保遊戲窗口在前台
                 self._ensure_game_foreground()
                 
+                # 每輪迴圈只截取一次屏幕，本輪的所有檢測共用同一幀
+                screen_image = image_detector.get_screen_image()
+                self.latest_screen_image = screen_image
+
                 # 檢查全局監控項
-                screen_image = self.modules['image_detector'].get_screen_image()
-                if self.modules['monitor_manager'].check_global_monitors(screen_image):
+                if screen_image is not None and \
+                        monitor_manager.check_global_monitors(screen_image):
                     continue  # 如果監控項有處理，則跳過當前循環的其他操作
                 
                 # 執行排程任務
-                if not self.modules['task_scheduler'].is_paused:
-                    self.modules['task_scheduler'].execute_current_task_step()
-                
-                # 短暫休眠以減少CPU使用
-                time.sleep(0.1)
+                if not task_scheduler.is_paused:
+                    task_scheduler.execute_current_task_step()
+
+                # 等待下一個工作到期或被外部事件喚醒，取代固定100ms輪詢
+                with wake_condition:
+                    wake_condition.wait(self._next_loop_timeout())
             
             except Exception as e:
+                import traceback
                 self.logger.error(f"主循環中遇到錯誤: {str(e)}")
                 self.logger.error(traceback.format_exc())
                 # 錯誤後稍微暫停一下，避免快速循環錯誤
                 time.sleep(1)
     
+    def _next_loop_timeout(self):
+        """計算主循環下一次等待的時長
+
+        以排程器的下一個到期時間為準，夾在0.05到0.5秒之間：
+        任務推進中時快速循環，完全空閒時減少無謂喚醒，
+        同時保持對遠程控制信號的響應速度。
+
+        Returns:
+            float: 等待秒數
+        """
+        due = self.modules['task_scheduler'].next_due_in()
+        if due is None:
+            return 0.5
+        return min(max(due, 0.05), 0.5)
+
+    def wake(self):
+        """喚醒正在等待的主循環（供暫停/恢復/關閉等外部事件調用）"""
+        with self._wake_condition:
+            self._wake_condition.notify_all()
+
     def _handle_game_status(self, status):
         """處理不同的遊戲狀態
         
@@ -306,93 +413,164 @@ class CoreEngine:
                 self.modules['task_scheduler'].resume_scheduler()
     
     def _ensure_game_foreground(self):
-        """確保遊戲窗口在前台"""
+        """確保遊戲窗口在前台
+
+        前景窗口未變更時直接返回，避免每輪都付出
+        窗口枚舉與標題查詢的成本。
+        """
         window_manager = self.modules['window_manager']
         game_manager = self.modules['game_manager']
-        
+
         if game_manager.current_status == GameStatus.RUNNING_NORMAL:
+            # 前景窗口自上次檢查以來沒有變更時無需重查
+            if not window_manager.consume_foreground_change():
+                return
+
             if not window_manager.is_foreground_window(game_manager.window_title):
-                window_manager.bring_to_foreground(game_manager.window_title)
+                if not window_manager.bring_to_foreground(game_manager.window_title):
+                    # 置前失敗時保留標誌，下一輪重試
+                    window_manager.mark_foreground_dirty()
     
-    def _check_remote_control_signals(self):
-        """檢查遠程控制信號"""
-        # 檢查暫停信號
-        if self.control_client.check_system_pause():
+    def _remote_poll_loop(self):
+        """背景線程：輪詢遠程控制客戶端並將信號排入佇列
+
+        輪詢從主循環移出，主循環每輪只需做一次非阻塞的佇列檢查。
+        """
+        while self.is_running:
+            client = self.control_client
+            if client is None:
+                time.sleep(0.5)
+                continue
+
+            enqueued = False
+
+            if client.check_system_pause():
+                self._remote_signal_queue.put(('pause',))
+                enqueued = True
+
+            if client.check_system_resume():
+                self._remote_signal_queue.put(('resume',))
+                enqueued = True
+
+            if client.check_restart_system():
+                self._remote_signal_queue.put(('restart_system',))
+                enqueued = True
+
+            if client.check_restart_game():
+                self._remote_signal_queue.put(('restart_game',))
+                enqueued = True
+
+            if client.check_reset_scheduler():
+                self._remote_signal_queue.put(('reset_scheduler',))
+                enqueued = True
+
+            if client.check_refresh_detection():
+                self._remote_signal_queue.put(('refresh_detection',))
+                enqueued = True
+
+            position_control = client.check_position_control()
+            if position_control[0]:
+                self._remote_signal_queue.put(
+                    ('position', position_control[0], position_control[1])
+                )
+                enqueued = True
+
+            job_id = client.check_remove_job()
+            if job_id:
+                self._remote_signal_queue.put(('remove_job', job_id))
+                enqueued = True
+
+            chat_content = client.check_chat_request()
+            if chat_content:
+                self._remote_signal_queue.put(('chat', chat_content))
+                enqueued = True
+
+            if enqueued:
+                self.wake()  # 讓主循環立即處理
+
+            time.sleep(0.2)
+
+    def _drain_remote_signals(self):
+        """消費佇列中的遠程控制信號
+
+        Returns:
+            bool: 是否處理了任何信號
+        """
+        handled = False
+
+        while True:
+            try:
+                signal_info = self._remote_signal_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            handled = True
+            self._handle_remote_signal(signal_info)
+
+        return handled
+
+    def _handle_remote_signal(self, signal_info):
+        """處理單一遠程控制信號
+
+        Args:
+            signal_info (tuple): 信號標記與附帶數據
+        """
+        kind = signal_info[0]
+
+        if kind == 'pause':
             self.logger.info("收到暫停信號，暫停系統")
             self.pause_all()
-            return True
-        
-        # 檢查恢復信號
-        if self.control_client.check_system_resume():
+
+        elif kind == 'resume':
             self.logger.info("收到恢復信號，恢復系統")
             self.resume_all()
-            return True
-        
-        # 檢查系統重啟信號
-        if self.control_client.check_restart_system():
+
+        elif kind == 'restart_system':
             self.logger.info("收到系統重啟信號，重啟系統")
             self.restart()
-            return True
-        
-        # 檢查遊戲重啟信號
-        if self.control_client.check_restart_game():
+
+        elif kind == 'restart_game':
             self.logger.info("收到遊戲重啟信號，重啟遊戲")
             self.modules['game_manager'].restart_game()
-            return True
-        
-        # 檢查重置排程信號
-        if self.control_client.check_reset_scheduler():
+
+        elif kind == 'reset_scheduler':
             self.logger.info("收到重置排程信號，重置排程器")
             self.modules['task_scheduler'].reset()
-            return True
-        
-        # 檢查刷新檢測信號
-        if self.control_client.check_refresh_detection():
+
+        elif kind == 'refresh_detection':
             self.logger.info("收到刷新檢測信號，刷新檢測")
             # 在新線程中執行以避免阻塞主循環
             def refresh_detection():
                 image_detector = self.modules['image_detector']
                 screen_image = image_detector.get_screen_image(force_refresh=True)
-                
+
                 monitor_manager = self.modules['monitor_manager']
                 monitor_manager.force_check_all(screen_image)
-            
+
             threading.Thread(target=refresh_detection, daemon=True).start()
-            return True
-        
-        # 檢查職位控制請求
-        position_control = self.control_client.check_position_control()
-        if position_control[0]:  # 如果有職位ID
-            position_id = position_control[0]
-            enable = position_control[1]
+
+        elif kind == 'position':
+            position_id, enable = signal_info[1], signal_info[2]
             self.logger.info(f"收到職位控制請求: {position_id} -> {'啟用' if enable else '禁用'}")
-            
+
             position_manager = self.modules['position_manager']
             if enable:
                 position_manager.enable_position(position_id)
             else:
                 position_manager.disable_position(position_id)
-            
+
             # 通知UI更新 - 新增此部分
             self._update_ui_after_position_change()
-            
-            return True
-                
-        # 檢查移除任務請求
-        job_id = self.control_client.check_remove_job()
-        if job_id:
+
+        elif kind == 'remove_job':
+            job_id = signal_info[1]
             self.logger.info(f"收到移除任務請求，ID: {job_id}")
             self._handle_remove_job(job_id)
-            return True
-        
-        # 檢查聊天請求
-        chat_content = self.control_client.check_chat_request()
-        if chat_content:
-            self.logger.info(f"收到聊天請求: '{chat_content}'")
-            self._handle_chat(chat_content)
-            return True
-        
-        return False
+
+        elif kind == 'chat':
+            content = signal_info[1]
+            self.logger.info(f"收到聊天請求: '{content}'")
+            self._handle_chat(content)
     
     def _update_ui_after_position_change(self):
         """職位變更後更新UI"""
@@ -459,6 +637,7 @@ class CoreEngine:
         self.is_paused = False
         self.modules['task_scheduler'].resume_scheduler()
         self.modules['monitor_manager'].resume_global_monitoring()
+        self.wake()
         self.logger.info("所有功能已恢復")
     
     def restart(self):
@@ -474,17 +653,37 @@ class CoreEngine:
         # 返回不再進入主循環，由調用方處理後續重啟
     
     def shutdown(self):
-        """關閉系統"""
+        """關閉系統
+
+        各模組的shutdown並行執行並設有超時，
+        單一模組卡住（如等待進程結束或網絡關閉）不會拖慢整體關閉。
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+
         self.logger.info("正在關閉系統...")
         self.is_running = False
-        
-        # 關閉所有模組
-        for name, module in self.modules.items():
-            if hasattr(module, 'shutdown'):
+        self.wake()
+
+        # 並行關閉所有模組
+        targets = {name: module for name, module in self.modules.items()
+                   if hasattr(module, 'shutdown')}
+        if targets:
+            # 不使用with語法：超時的模組不應阻塞executor本身的關閉
+            executor = ThreadPoolExecutor(max_workers=len(targets),
+                                          thread_name_prefix="shutdown")
+            futures = {executor.submit(module.shutdown): name
+                       for name, module in targets.items()}
+            done, not_done = wait(futures, timeout=5)
+
+            for future in done:
                 try:
-                    module.shutdown()
+                    future.result()
                 except Exception as e:
-                    self.logger.error(f"關閉模組 {name} 時出錯: {str(e)}")
+                    self.logger.error(f"關閉模組 {futures[future]} 時出錯: {str(e)}")
+            for future in not_done:
+                self.logger.error(f"關閉模組 {futures[future]} 超時")
+
+            executor.shutdown(wait=False)
         
         # 關閉遠程控制客戶端
         if self.control_client:
@@ -493,4 +692,9 @@ class CoreEngine:
             except Exception as e:
                 self.logger.error(f"關閉遠程控制客戶端時出錯: {str(e)}")
         
-        self.logger.info("系統已關閉")
\ No newline at end of file
+        self.logger.info("系統已關閉")
+
+        # 最後停止日誌監聽器，確保上面的記錄都寫出
+        if self._log_listener is not None:
+            self._log_listener.stop()
+            self._log_listener = None
\ No newline at end of file
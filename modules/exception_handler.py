@@ -27,8 +27,30 @@ class ExceptionHandler:
         
         # 從配置載入例外處理設置
         self.exceptions_config = config.get('exceptions', {})
-        
+
+        # 各UI按鈕的搜索區域（可選）：
+        # 彈窗按鈕位置固定，限定區域可大幅縮小模板匹配範圍
+        self.button_regions = self.exceptions_config.get('button_regions', {})
+
+        # 預載恢復流程會用到的按鈕模板，
+        # 首次例外事件發生時不必再付出磁盤讀取與PNG解碼成本
+        self._preload_button_templates()
+
         self.logger.info("例外處理器初始化完成")
+
+    def _preload_button_templates(self):
+        """預載所有恢復按鈕模板到圖像識別器的緩存"""
+        button_paths = set()
+        for buttons, _ in self._RECOVERY.values():
+            button_paths.update(buttons)
+        button_paths.update([
+            "ui/home_button.png",
+            "ui/main_screen_indicator.png",
+        ])
+
+        for path in sorted(button_paths):
+            if self.image_detector.load_template(path) is None:
+                self.logger.warning("預載按鈕模板失敗: %s", path)
     
     def register_exception_monitors(self, monitor_manager):
         """註冊所有例外監控項
@@ -48,7 +70,8 @@ class ExceptionHandler:
                 patterns=[{
                     'detector': self._template_detector,
                     'template': maintenance_config['template'],
-                    'threshold': maintenance_config.get('threshold', 0.85)
+                    'threshold': maintenance_config.get('threshold', 0.85),
+                    'region': maintenance_config.get('region')
                 }],
                 check_interval=maintenance_config.get('check_interval', 60)
             )
@@ -64,7 +87,8 @@ class ExceptionHandler:
                 patterns=[{
                     'detector': self._template_detector,
                     'template': remote_login_config['template'],
-                    'threshold': remote_login_config.get('threshold', 0.9)
+                    'threshold': remote_login_config.get('threshold', 0.9),
+                    'region': remote_login_config.get('region')
                 }],
                 check_interval=remote_login_config.get('check_interval', 30)
             )
@@ -80,7 +104,8 @@ class ExceptionHandler:
                 patterns.append({
                     'detector': self._template_detector,
                     'template': template,
-                    'threshold': popup_ad_config.get('threshold', 0.8)
+                    'threshold': popup_ad_config.get('threshold', 0.8),
+                    'region': popup_ad_config.get('region')
                 })
             
             if patterns:
@@ -103,7 +128,8 @@ class ExceptionHandler:
                 patterns=[{
                     'detector': self._template_detector,
                     'template': network_error_config['template'],
-                    'threshold': network_error_config.get('threshold', 0.9)
+                    'threshold': network_error_config.get('threshold', 0.9),
+                    'region': network_error_config.get('region')
                 }],
                 check_interval=network_error_config.get('check_interval', 30)
             )
@@ -123,205 +149,164 @@ class ExceptionHandler:
         Returns:
             tuple: 匹配位置，如果沒有匹配則返回None
         """
-        # 使用圖像識別器進行模板匹配
+        # 使用圖像識別器進行模板匹配，
+        # 傳入監控管理器提供的當前幀，所有監控項共用同一次截圖
         matches = self.image_detector.find_template(
             template_path,
             threshold=threshold,
             region=region,
-            max_results=1
+            max_results=1,
+            screen_image=screen_image
         )
         
         if matches:
             return matches[0]  # 返回第一個匹配位置
         return None
     
+    def _find_button(self, template_path):
+        """查找UI按鈕
+
+        若配置中為該按鈕指定了搜索區域，
+        則只在該區域內進行模板匹配。
+
+        Args:
+            template_path (str): 按鈕模板路徑
+
+        Returns:
+            list: 匹配位置列表 [(x, y), ...]
+        """
+        # 以不含副檔名的文件名作為配置鍵，如 ui/confirm_button.png -> confirm_button
+        button_name = template_path.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+        region = self.button_regions.get(button_name)
+        return self.image_detector.find_template(template_path, region=region)
+
+    # 各例外的恢復按鈕序列與點擊後的等待時長：
+    # 依序嘗試按鈕，第一個找到的生效，全部失敗時退回ESC
+    _RECOVERY = {
+        'maintenance': (("ui/confirm_button.png", "ui/close_button.png"), 0.3),
+        'popup_ad': (("ui/close_button.png", "ui/cancel_button.png"), 0.2),
+        'network_error': (("ui/confirm_button.png", "ui/retry_button.png"), 0.3),
+    }
+
+    def _handle_by_button_list(self, event_name, buttons, sleep_after):
+        """依序嘗試點擊恢復按鈕，全部找不到時按ESC
+
+        Args:
+            event_name (str): 例外名稱（用於日誌）
+            buttons (tuple): 依序嘗試的按鈕模板路徑
+            sleep_after (float): 操作後的等待秒數
+
+        Returns:
+            bool: 恒為True（無法確定是否處理成功時也返回True以防重複觸發）
+        """
+        for button in buttons:
+            matches = self._find_button(button)
+            if matches:
+                x, y = matches[0]
+                self.action_executor.click_at(x, y)
+                self.logger.info("已點擊 %s 恢復按鈕: %s", event_name, button)
+                time.sleep(sleep_after)
+                return True
+
+        # 如果都找不到，可以嘗試按ESC
+        self.action_executor.key_press('esc')
+        self.logger.info("已嘗試按ESC關閉 %s", event_name)
+        time.sleep(sleep_after)
+        return True
+
     def handle_maintenance(self, match_info):
         """處理伺服器維護
-        
+
         Args:
             match_info (dict): 匹配信息
-        
+
         Returns:
             bool: 是否成功處理
         """
         self.logger.info("檢測到伺服器維護通知")
-        
-        # 獲取匹配位置
-        x, y = match_info['match']
-        
-        # 基本處理：尋找並點擊確認按鈕
-        confirm_button = self.image_detector.find_template("ui/confirm_button.png")
-        if confirm_button:
-            confirm_x, confirm_y = confirm_button[0], confirm_button[1]
-            self.action_executor.click_at(confirm_x, confirm_y)
-            self.logger.info("已點擊維護通知確認按鈕")
-            time.sleep(1)
-            return True
-        
-        # 如果找不到確認按鈕，可以嘗試點擊關閉按鈕 (X)
-        close_button = self.image_detector.find_template("ui/close_button.png")
-        if close_button:
-            close_x, close_y = close_button[0], close_button[1]
-            self.action_executor.click_at(close_x, close_y)
-            self.logger.info("已點擊維護通知關閉按鈕")
-            time.sleep(1)
-            return True
-        
-        # 如果都找不到，可以嘗試按ESC
-        self.action_executor.key_press('esc')
-        self.logger.info("已嘗試按ESC關閉維護通知")
-        time.sleep(1)
-        
-        # 無法確定是否處理成功，返回True以防再次觸發
-        return True
-    
+        buttons, sleep_after = self._RECOVERY['maintenance']
+        return self._handle_by_button_list('maintenance', buttons, sleep_after)
+
     def handle_remote_login(self, match_info):
         """處理異地登入
-        
+
         Args:
             match_info (dict): 匹配信息
-        
+
         Returns:
             bool: 是否成功處理
         """
         self.logger.warning("檢測到異地登入通知")
-        
-        # 獲取匹配位置
-        x, y = match_info['match']
-        
+
         # 基本處理：尋找並點擊確認按鈕
-        confirm_button = self.image_detector.find_template("ui/confirm_button.png")
+        confirm_button = self._find_button("ui/confirm_button.png")
         if confirm_button:
-            confirm_x, confirm_y = confirm_button[0], confirm_button[1]
+            confirm_x, confirm_y = confirm_button[0]
             self.action_executor.click_at(confirm_x, confirm_y)
             self.logger.info("已點擊異地登入通知確認按鈕")
-            time.sleep(1)
-        
+            time.sleep(0.3)
+
         # 不論是否找到確認按鈕，都需要重啟遊戲
         self.logger.info("需要重啟遊戲處理異地登入")
-        
+
         # 返回True，實際重啟由game_manager通過檢測狀態來處理
         return True
-    
+
     def handle_popup_ad(self, match_info):
         """處理彈窗廣告
-        
+
         Args:
             match_info (dict): 匹配信息
-        
+
         Returns:
             bool: 是否成功處理
         """
         self.logger.info("檢測到彈窗廣告")
-        
-        # 獲取匹配位置
-        x, y = match_info['match']
-        
-        # 基本處理：尋找並點擊關閉按鈕 (X)
-        close_button = self.image_detector.find_template("ui/close_button.png")
-        if close_button:
-            close_x, close_y = close_button[0], close_button[1]
-            self.action_executor.click_at(close_x, close_y)
-            self.logger.info("已點擊彈窗廣告關閉按鈕")
-            time.sleep(0.5)  # 短暫等待關閉動畫
-            return True
-        
-        # 如果找不到關閉按鈕，可以嘗試點擊取消按鈕
-        cancel_button = self.image_detector.find_template("ui/cancel_button.png")
-        if cancel_button:
-            cancel_x, cancel_y = cancel_button[0], cancel_button[1]
-            self.action_executor.click_at(cancel_x, cancel_y)
-            self.logger.info("已點擊彈窗廣告取消按鈕")
-            time.sleep(0.5)
-            return True
-        
-        # 如果都找不到，可以嘗試按ESC
-        self.action_executor.key_press('esc')
-        self.logger.info("已嘗試按ESC關閉彈窗廣告")
-        time.sleep(0.5)
-        
-        # 無法確定是否處理成功，返回True以防再次觸發
-        return True
-    
+        buttons, sleep_after = self._RECOVERY['popup_ad']
+        return self._handle_by_button_list('popup_ad', buttons, sleep_after)
+
     def handle_network_error(self, match_info):
         """處理網絡錯誤
-        
+
         Args:
             match_info (dict): 匹配信息
-        
+
         Returns:
             bool: 是否成功處理
         """
         self.logger.warning("檢測到網絡錯誤")
-        
-        # 獲取匹配位置
-        x, y = match_info['match']
-        
-        # 基本處理：尋找並點擊確認按鈕
-        confirm_button = self.image_detector.find_template("ui/confirm_button.png")
-        if confirm_button:
-            confirm_x, confirm_y = confirm_button[0], confirm_button[1]
-            self.action_executor.click_at(confirm_x, confirm_y)
-            self.logger.info("已點擊網絡錯誤確認按鈕")
-            time.sleep(1)
-            return True
-        
-        # 如果找不到確認按鈕，可以嘗試點擊重試按鈕
-        retry_button = self.image_detector.find_template("ui/retry_button.png")
-        if retry_button:
-            retry_x, retry_y = retry_button[0], retry_button[1]
-            self.action_executor.click_at(retry_x, retry_y)
-            self.logger.info("已點擊網絡錯誤重試按鈕")
-            time.sleep(1)
-            return True
-        
-        # 如果都找不到，可以嘗試按ESC
-        self.action_executor.key_press('esc')
-        self.logger.info("已嘗試按ESC關閉網絡錯誤")
-        time.sleep(1)
-        
-        # 無法確定是否處理成功，返回True以防再次觸發
-        return True
-    
+        buttons, sleep_after = self._RECOVERY['network_error']
+        return self._handle_by_button_list('network_error', buttons, sleep_after)
+
     def handle_wrong_screen(self, match_info):
         """處理畫面異常
-        
+
         Args:
             match_info (dict): 匹配信息
-        
+
         Returns:
             bool: 是否成功處理
         """
         self.logger.warning("檢測到畫面異常")
-        
-        # 嘗試按ESC回到主畫面
-        self.action_executor.key_press('esc')
-        time.sleep(1)
-        
-        # 檢查是否回到主畫面
-        main_screen = self.image_detector.find_template("ui/main_screen_indicator.png")
-        if main_screen:
-            self.logger.info("已成功回到主畫面")
-            return True
-        
-        # 如果還不是主畫面，再按一次ESC
-        self.action_executor.key_press('esc')
-        time.sleep(1)
-        
-        # 再次檢查
-        main_screen = self.image_detector.find_template("ui/main_screen_indicator.png")
-        if main_screen:
-            self.logger.info("已成功回到主畫面")
-            return True
-        
+
+        # 最多按兩次ESC，以輪詢等待取代固定1秒休眠，
+        # 主畫面一出現即返回
+        for _ in range(2):
+            self.action_executor.key_press('esc')
+            main_screen = self.image_detector.wait_for_template(
+                "ui/main_screen_indicator.png", timeout=1.5)
+            if main_screen:
+                self.logger.info("已成功回到主畫面")
+                return True
+
         # 如果兩次ESC都失敗，嘗試點擊主頁按鈕
-        home_button = self.image_detector.find_template("ui/home_button.png")
+        home_button = self._find_button("ui/home_button.png")
         if home_button:
-            home_x, home_y = home_button[0], home_button[1]
+            home_x, home_y = home_button[0]
             self.action_executor.click_at(home_x, home_y)
             self.logger.info("已點擊主頁按鈕")
-            time.sleep(1)
+            time.sleep(0.5)
             return True
-        
+
         self.logger.warning("無法處理畫面異常")
-        return False
\ No newline at end of file
+        return False
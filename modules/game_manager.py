@@ -10,9 +10,34 @@ import os
 import time
 import logging
 import subprocess
+import ctypes
+import ctypes.wintypes
 import psutil
 from enum import Enum
 
+from .window_manager import WindowManager
+
+# Toolhelp32進程快照相關常量與結構：
+# 按名稱掃描進程時，原生快照每個進程只返回一個定長結構（名稱已附帶），
+# 比psutil.process_iter逐進程構建Python字典快一個數量級
+TH32CS_SNAPPROCESS = 0x00000002
+INVALID_HANDLE_VALUE = ctypes.wintypes.HANDLE(-1).value
+
+class PROCESSENTRY32W(ctypes.Structure):
+    """Toolhelp32快照的進程條目結構（Unicode版本）"""
+    _fields_ = [
+        ("dwSize", ctypes.wintypes.DWORD),
+        ("cntUsage", ctypes.wintypes.DWORD),
+        ("th32ProcessID", ctypes.wintypes.DWORD),
+        ("th32DefaultHeapID", ctypes.c_size_t),
+        ("th32ModuleID", ctypes.wintypes.DWORD),
+        ("cntThreads", ctypes.wintypes.DWORD),
+        ("th32ParentProcessID", ctypes.wintypes.DWORD),
+        ("pcPriClassBase", ctypes.wintypes.LONG),
+        ("dwFlags", ctypes.wintypes.DWORD),
+        ("szExeFile", ctypes.c_wchar * 260),
+    ]
+
 class GameStatus(Enum):
     """遊戲狀態枚舉"""
     NOT_RUNNING = 0         # 遊戲未運行
@@ -29,14 +54,17 @@ class GameStatus(Enum):
 class GameProcessManager:
     """遊戲進程管理器類"""
     
-    def __init__(self, config):
+    def __init__(self, config, window_manager=None):
         """初始化遊戲進程管理器
         
         Args:
             config (dict): 系統配置
+            window_manager (WindowManager, optional): 共享的視窗管理器；
+                未提供時在首次需要時建立並復用
         """
         self.config = config
         self.logger = logging.getLogger("GameManager")
+        self._window_manager = window_manager
         
         # 從配置中獲取遊戲相關設置
         self.game_path = config['game']['game_path']
@@ -49,6 +77,27 @@ class GameProcessManager:
         self.process_id = None
         self.current_status = GameStatus.UNKNOWN
         self.start_time = None
+
+        # 緩存的進程句柄：驗證緩存只需單個進程的系統調用，
+        # 避免每次狀態檢查都做全系統進程掃描
+        self._cached_process = None
+
+        # 緩存的遊戲窗口句柄：驗證緩存為O(1)，
+        # 只有失效時才重新枚舉桌面窗口
+        self._cached_hwnd = None
+
+        # 卡死探測結果緩存：狀態檢查頻繁時不必每次都向窗口發消息
+        self.freeze_check_interval = config['game'].get('freeze_check_interval', 5)
+        self._last_freeze_check = 0.0
+        self._last_freeze_result = True
+
+        # 溫和關閉的最後期限：超過期限仍未退出則強制終止
+        self._close_deadline = None
+
+        # 狀態檢查結果緩存：進程狀態變化不會快於秒級，
+        # 高頻調用時直接返回上次結果
+        self._status_cache_ttl = config['game'].get('status_cache_ttl', 1.0)
+        self._status_cached_at = 0.0
         
         # 進行初始狀態檢測
         self.check_game_status()
@@ -61,6 +110,33 @@ class GameProcessManager:
         Returns:
             GameStatus: 遊戲狀態
         """
+        # 距上次完整檢查不足TTL時直接返回緩存結果；
+        # 狀態轉換操作（啟動/關閉/重啟）會使緩存失效
+        now = time.time()
+        if now - self._status_cached_at < self._status_cache_ttl:
+            return self.current_status
+        self._status_cached_at = now
+        
+        # 關閉中：輪詢進程是否已退出，超過期限則強制終止
+        # （close_game發出terminate後立即返回，不阻塞監控線程）
+        if self.current_status == GameStatus.CLOSING:
+            process = self._find_game_process()
+            if not process:
+                self.current_status = GameStatus.NOT_RUNNING
+                self.process_id = None
+                self.start_time = None
+                self._close_deadline = None
+                self.logger.info("遊戲已關閉")
+                return self.current_status
+            if self._close_deadline and time.time() > self._close_deadline:
+                self.logger.warning("進程未能正常終止，正在強制終止")
+                try:
+                    process.kill()
+                except psutil.NoSuchProcess:
+                    pass
+                self._close_deadline = None
+            return self.current_status
+        
         # 嘗試查找遊戲進程
         process = self._find_game_process()
         
@@ -107,14 +183,33 @@ class GameProcessManager:
         
         self.logger.info(f"正在啟動遊戲: {self.game_path}")
         self.current_status = GameStatus.STARTING
+        self._status_cached_at = 0.0
         
         try:
-            # 使用subprocess啟動遊戲
-            subprocess.Popen(self.game_path, shell=True)
+            # 直接啟動遊戲，不經過cmd.exe（shell=True會多一層中間進程），
+            # 並與本進程的控制台和進程組分離
+            popen = subprocess.Popen(
+                [self.game_path],
+                creationflags=(subprocess.DETACHED_PROCESS |
+                               subprocess.CREATE_NEW_PROCESS_GROUP)
+            )
             
-            # 等待遊戲啟動
+            # 啟動的若就是遊戲本體（而非啟動器），可直接取用Popen的PID，
+            # 免去輪詢等待進程出現
+            try:
+                launched = psutil.Process(popen.pid)
+                if launched.name().lower() == self.process_name.lower():
+                    self._cached_process = launched
+                    self.process_id = popen.pid
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            
+            # 等待遊戲啟動：以指數退避輪詢（100ms起、上限500ms），
+            # 進程一出現即繼續，不必等滿整秒
+            # （啟動器場景下遊戲本體由啟動器再行拉起，仍需按名稱尋找）
             start_wait_time = time.time()
             max_wait_time = self.startup_wait_time
+            poll_interval = 0.1
             
             while time.time() - start_wait_time < max_wait_time:
                 process = self._find_game_process()
@@ -124,16 +219,22 @@ class GameProcessManager:
                     self.current_status = GameStatus.RUNNING_NORMAL
                     self.logger.info("遊戲啟動成功")
                     
-                    # 添加以下代碼: 設置窗口位置和大小
-                    # 等待窗口創建和初始化
-                    time.sleep(3)  # 給遊戲一些時間創建窗口
+                    # 等待窗口創建和初始化：
+                    # 輪詢窗口是否出現，取代固定3秒休眠
+                    window_wait_start = time.time()
+                    while time.time() - window_wait_start < 5:
+                        if self._find_game_window():
+                            break
+                        time.sleep(0.1)
                     
-                    # 導入window_manager模塊，以直接調用設置窗口位置的方法
-                    from modules.window_manager import WindowManager
+                    # 復用引擎注入的視窗管理器；獨立使用時建立一次後保留，
+                    # 避免每次遊戲重啟都遺留新的監控線程
+                    if self._window_manager is None:
+                        self._window_manager = WindowManager(self.config)
+                    window_manager = self._window_manager
                     
                     # 嘗試設置窗口位置和大小
                     for attempt in range(3):  # 最多嘗試3次
-                        window_manager = WindowManager(self.config)
                         if window_manager.set_window_position():
                             self.logger.info("已設置遊戲窗口位置和大小")
                             break
@@ -143,8 +244,9 @@ class GameProcessManager:
                     
                     return True
                 
-                # 短暫休眠
-                time.sleep(1)
+                # 短暫休眠後重試，間隔逐步放大
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, 0.5)
             
             # 超時未檢測到遊戲進程
             self.logger.error(f"遊戲啟動超時 ({max_wait_time} 秒)")
@@ -171,6 +273,7 @@ class GameProcessManager:
         
         self.logger.info(f"正在{'強制' if force else ''}關閉遊戲")
         self.current_status = GameStatus.CLOSING
+        self._status_cached_at = 0.0
         
         try:
             if self.process_id:
@@ -179,38 +282,36 @@ class GameProcessManager:
                 if force:
                     # 強制終止進程
                     process.kill()
-                else:
-                    # 嘗試溫和地終止進程
-                    process.terminate()
-                    
-                    # 等待進程結束
-                    try:
-                        process.wait(timeout=10)
-                    except psutil.TimeoutExpired:
-                        # 如果超時，則強制終止
-                        self.logger.warning("進程未能正常終止，正在強制終止")
-                        process.kill()
+                    self.logger.info("遊戲已關閉")
+                    self.current_status = GameStatus.NOT_RUNNING
+                    self.process_id = None
+                    self.start_time = None
+                    self._cached_process = None
+                    return True
                 
-                self.logger.info("遊戲已關閉")
-                self.current_status = GameStatus.NOT_RUNNING
-                self.process_id = None
-                self.start_time = None
+                # 嘗試溫和地終止進程後立即返回，不阻塞調用線程；
+                # 進程退出由後續的check_game_status在CLOSING狀態下確認，
+                # 超過期限仍未退出則在那裡強制終止
+                process.terminate()
+                self._close_deadline = time.time() + 10
                 return True
             
             else:
                 # 如果沒有進程ID，嘗試通過進程名稱查找並終止
-                for proc in psutil.process_iter(['pid', 'name']):
-                    if proc.info['name'] == self.process_name:
-                        if force:
-                            proc.kill()
-                        else:
-                            proc.terminate()
-                        
+                pid = self._find_pid_by_name_native(self.process_name)
+                if pid is not None:
+                    proc = psutil.Process(pid)
+                    if force:
+                        proc.kill()
                         self.logger.info("遊戲已關閉")
                         self.current_status = GameStatus.NOT_RUNNING
                         self.process_id = None
                         self.start_time = None
                         return True
+                    
+                    proc.terminate()
+                    self._close_deadline = time.time() + 10
+                    return True
             
             self.logger.warning("找不到遊戲進程，無法關閉")
             self.current_status = GameStatus.NOT_RUNNING
@@ -222,6 +323,7 @@ class GameProcessManager:
             self.current_status = GameStatus.NOT_RUNNING
             self.process_id = None
             self.start_time = None
+            self._cached_process = None
             return False
     
     def restart_game(self):
@@ -288,26 +390,73 @@ class GameProcessManager:
         Returns:
             psutil.Process: 進程對象，如果未找到則返回None
         """
-        # 如果已有進程ID，則嘗試直接獲取
+        # 優先驗證緩存的進程句柄（單個進程的廉價系統調用）
+        process = self._cached_process
+        if process is not None:
+            try:
+                if process.is_running() and process.status() != psutil.STATUS_ZOMBIE:
+                    return process
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+            self._cached_process = None
+        
+        # 如果已有進程ID但沒有緩存句柄，則嘗試直接獲取
         if self.process_id:
             try:
                 process = psutil.Process(self.process_id)
                 # 檢查進程是否還在運行中
                 if process.is_running() and process.status() != psutil.STATUS_ZOMBIE:
+                    self._cached_process = process
                     return process
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 pass
         
-        # 如果通過ID找不到，則嘗試通過進程名稱查找
-        for proc in psutil.process_iter(['pid', 'name']):
+        # 緩存失效時才退回全系統進程掃描（原生快照按名稱查找PID）
+        pid = self._find_pid_by_name_native(self.process_name)
+        if pid is not None:
             try:
-                if proc.info['name'] == self.process_name:
-                    return proc
+                process = psutil.Process(pid)
+                self._cached_process = process
+                return process
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
         
         return None
     
+    def _find_pid_by_name_native(self, name):
+        """通過Toolhelp32快照按名稱查找進程PID
+        
+        Args:
+            name (str): 進程名稱（如 LastWar.exe）
+        
+        Returns:
+            int: 進程PID，未找到時返回None
+        """
+        try:
+            kernel32 = ctypes.windll.kernel32
+            snapshot = kernel32.CreateToolhelp32Snapshot(TH32CS_SNAPPROCESS, 0)
+            if snapshot == INVALID_HANDLE_VALUE:
+                return None
+            
+            try:
+                entry = PROCESSENTRY32W()
+                entry.dwSize = ctypes.sizeof(PROCESSENTRY32W)
+                name_lower = name.lower()
+                
+                has_next = kernel32.Process32FirstW(snapshot, ctypes.byref(entry))
+                while has_next:
+                    if entry.szExeFile.lower() == name_lower:
+                        return entry.th32ProcessID
+                    has_next = kernel32.Process32NextW(snapshot, ctypes.byref(entry))
+                
+                return None
+            finally:
+                kernel32.CloseHandle(snapshot)
+        
+        except (OSError, AttributeError) as e:
+            self.logger.warning(f"原生進程快照掃描失敗: {str(e)}")
+            return None
+    
     def _find_game_window(self):
         """查找遊戲窗口
         
@@ -316,6 +465,17 @@ class GameProcessManager:
         """
         import win32gui
         
+        # 優先驗證緩存的窗口句柄，避免每次都枚舉桌面所有窗口
+        hwnd = self._cached_hwnd
+        if hwnd:
+            try:
+                if win32gui.IsWindow(hwnd) and win32gui.IsWindowVisible(hwnd) and \
+                        self.window_title in win32gui.GetWindowText(hwnd):
+                    return True
+            except Exception:
+                pass
+            self._cached_hwnd = None
+        
         # 定義回調函數以找到窗口
         def enum_windows_callback(hwnd, result):
             title = win32gui.GetWindowText(hwnd)
@@ -326,7 +486,10 @@ class GameProcessManager:
         window_handles = []
         win32gui.EnumWindows(enum_windows_callback, window_handles)
         
-        return len(window_handles) > 0
+        if window_handles:
+            self._cached_hwnd = window_handles[0]
+            return True
+        return False
     
     def _is_process_responding(self, process):
         """檢查進程是否響應
@@ -344,10 +507,41 @@ class GameProcessManager:
             # 如果進程狀態不是正常運行，則認為沒有響應
             if status in [psutil.STATUS_ZOMBIE, psutil.STATUS_DEAD]:
                 return False
-            
-            # 如果能獲取到CPU時間，則認為進程在響應
-            process.cpu_percent()
-            return True
         
         except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return False
+        
+        # GUI響應探測成本較高，結果在freeze_check_interval內緩存
+        now = time.monotonic()
+        if now - self._last_freeze_check < self.freeze_check_interval:
+            return self._last_freeze_result
+        
+        self._last_freeze_check = now
+        self._last_freeze_result = self._is_window_responding()
+        return self._last_freeze_result
+    
+    def _is_window_responding(self):
+        """探測遊戲窗口是否響應消息
+        
+        向窗口發送WM_NULL並帶SMTO_ABORTIFHUNG，
+        與任務管理器判斷「沒有回應」的機制相同。
+        
+        Returns:
+            bool: 窗口是否響應；沒有可探測的窗口時返回True
+        """
+        import win32gui
+        import win32con
+        
+        hwnd = self._cached_hwnd
+        if not hwnd or not win32gui.IsWindow(hwnd):
+            # 沒有窗口可探測時不判定為卡死
+            return True
+        
+        SMTO_ABORTIFHUNG = 0x0002
+        try:
+            win32gui.SendMessageTimeout(
+                hwnd, win32con.WM_NULL, 0, 0, SMTO_ABORTIFHUNG, 500)
+            return True
+        except win32gui.error:
+            # 超時即消息隊列無響應，視為卡死
             return False
\ No newline at end of file
@@ -7,6 +7,7 @@
 """
 
 import time
+import queue
 import logging
 import threading
 import keyboard
@@ -14,6 +15,19 @@ from win10toast import ToastNotifier
 
 class HotkeySystem:
     """快捷鍵系統類"""
+
+    # 快捷鍵配置鍵到處理方法與日誌描述的映射，
+    # 註冊時表驅動遍歷，取代逐項的if分支
+    _HOTKEY_ACTIONS = (
+        ('toggle_all', 'toggle_all', "暫停/恢復所有功能"),
+        ('toggle_scheduler', 'toggle_scheduler', "暫停/恢復排程器"),
+        ('toggle_detection', 'toggle_detection', "暫停/恢復檢測"),
+        ('emergency_stop', 'emergency_stop', "緊急停止"),
+        ('restart_task', 'restart_current_task', "重啟當前任務"),
+        ('skip_task', 'skip_current_task', "跳過當前任務"),
+        ('force_refresh', 'force_refresh', "強制刷新檢測"),
+        ('toggle_status', 'toggle_status_display', "切換狀態顯示"),
+    )
     
     def __init__(self, config, core_engine):
         """初始化快捷鍵系統
@@ -33,6 +47,10 @@ class HotkeySystem:
         # 載入配置中的快捷鍵設置
         self.hotkey_config = config.get('hotkeys', {})
         
+        # 模塊引用在首次觸發快捷鍵時綁定一次
+        # （初始化時引擎的模塊表可能尚未填充完整）
+        self._modules_bound = False
+        
         # 初始化通知器
         try:
             self.notifier = ToastNotifier()
@@ -41,6 +59,18 @@ class HotkeySystem:
             self.logger.warning(f"無法初始化通知器: {str(e)}")
             self.notification_enabled = False
         
+        # 通知由單一常駐線程依序顯示：
+        # 不必每次通知都建立新線程，並序列化ToastNotifier調用
+        # （其不容許並發顯示）
+        if self.notification_enabled:
+            self._notify_q = queue.Queue(maxsize=32)
+            self._notify_thread = threading.Thread(
+                target=self._notify_worker,
+                name="NotifyWorker",
+                daemon=True
+            )
+            self._notify_thread.start()
+        
         # 註冊快捷鍵
         self._register_hotkeys()
         
@@ -50,82 +80,38 @@ class HotkeySystem:
         """註冊所有快捷鍵"""
         self.logger.info("註冊快捷鍵")
         
+        # 保存keyboard返回的句柄，關閉時只解除自己註冊的快捷鍵
+        self._hotkey_handles = []
+        
         try:
-            # 註冊暫停/恢復所有功能的快捷鍵
-            if 'toggle_all' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['toggle_all'],
-                    self.toggle_all,
-                    suppress=True
-                )
-                self.logger.info(f"註冊暫停/恢復所有功能的快捷鍵: {self.hotkey_config['toggle_all']}")
-            
-            # 註冊暫停/恢復排程器的快捷鍵
-            if 'toggle_scheduler' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['toggle_scheduler'],
-                    self.toggle_scheduler,
-                    suppress=True
-                )
-                self.logger.info(f"註冊暫停/恢復排程器的快捷鍵: {self.hotkey_config['toggle_scheduler']}")
-            
-            # 註冊暫停/恢復檢測的快捷鍵
-            if 'toggle_detection' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['toggle_detection'],
-                    self.toggle_detection,
-                    suppress=True
-                )
-                self.logger.info(f"註冊暫停/恢復檢測的快捷鍵: {self.hotkey_config['toggle_detection']}")
-            
-            # 註冊緊急停止的快捷鍵
-            if 'emergency_stop' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['emergency_stop'],
-                    self.emergency_stop,
+            for config_key, method_name, description in self._HOTKEY_ACTIONS:
+                if config_key not in self.hotkey_config:
+                    continue
+                
+                handle = keyboard.add_hotkey(
+                    self.hotkey_config[config_key],
+                    getattr(self, method_name),
                     suppress=True
                 )
-                self.logger.info(f"註冊緊急停止的快捷鍵: {self.hotkey_config['emergency_stop']}")
-            
-            # 註冊重啟當前任務的快捷鍵
-            if 'restart_task' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['restart_task'],
-                    self.restart_current_task,
-                    suppress=True
-                )
-                self.logger.info(f"註冊重啟當前任務的快捷鍵: {self.hotkey_config['restart_task']}")
-            
-            # 註冊跳過當前任務的快捷鍵
-            if 'skip_task' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['skip_task'],
-                    self.skip_current_task,
-                    suppress=True
-                )
-                self.logger.info(f"註冊跳過當前任務的快捷鍵: {self.hotkey_config['skip_task']}")
-            
-            # 註冊強制刷新檢測的快捷鍵
-            if 'force_refresh' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['force_refresh'],
-                    self.force_refresh,
-                    suppress=True
-                )
-                self.logger.info(f"註冊強制刷新檢測的快捷鍵: {self.hotkey_config['force_refresh']}")
-            
-            # 註冊切換狀態顯示的快捷鍵
-            if 'toggle_status' in self.hotkey_config:
-                keyboard.add_hotkey(
-                    self.hotkey_config['toggle_status'],
-                    self.toggle_status_display,
-                    suppress=True
-                )
-                self.logger.info(f"註冊切換狀態顯示的快捷鍵: {self.hotkey_config['toggle_status']}")
+                self._hotkey_handles.append(handle)
+                self.logger.info(f"註冊{description}的快捷鍵: {self.hotkey_config[config_key]}")
             
         except Exception as e:
             self.logger.error(f"註冊快捷鍵時出錯: {str(e)}")
     
+    def _bind_modules(self):
+        """綁定常用模塊引用（只在首次快捷鍵觸發時執行一次）"""
+        if self._modules_bound:
+            return
+        
+        modules = self.core_engine.modules
+        self._task_scheduler = modules['task_scheduler']
+        self._monitor_manager = modules['monitor_manager']
+        self._action_executor = modules['action_executor']
+        self._image_detector = modules['image_detector']
+        self._game_manager = modules['game_manager']
+        self._modules_bound = True
+    
     def toggle_all(self):
         """切換所有功能"""
         self.logger.info("快捷鍵觸發: 切換所有功能")
@@ -141,7 +127,8 @@ class HotkeySystem:
         """切換排程功能"""
         self.logger.info("快捷鍵觸發: 切換排程功能")
         
-        task_scheduler = self.core_engine.modules['task_scheduler']
+        self._bind_modules()
+        task_scheduler = self._task_scheduler
         
         if task_scheduler.is_paused:
             task_scheduler.resume_scheduler()
@@ -156,7 +143,8 @@ class HotkeySystem:
         """切換檢測功能"""
         self.logger.info("快捷鍵觸發: 切換檢測功能")
         
-        monitor_manager = self.core_engine.modules['monitor_manager']
+        self._bind_modules()
+        monitor_manager = self._monitor_manager
         
         if self.is_detection_paused:
             monitor_manager.resume_global_monitoring()
@@ -171,14 +159,16 @@ class HotkeySystem:
         """緊急停止所有操作"""
         self.logger.info("快捷鍵觸發: 緊急停止")
         
+        self._bind_modules()
+        
         # 暫停所有功能
         self.core_engine.pause_all()
         
         # 停止所有動作
-        self.core_engine.modules['action_executor'].stop_all_actions()
+        self._action_executor.stop_all_actions()
         
         # 重置任務排程器
-        self.core_engine.modules['task_scheduler'].reset()
+        self._task_scheduler.reset()
         
         self._show_notification("緊急停止", "所有操作已停止", "緊急")
     
@@ -186,7 +176,8 @@ class HotkeySystem:
         """重啟當前任務"""
         self.logger.info("快捷鍵觸發: 重啟當前任務")
         
-        task_scheduler = self.core_engine.modules['task_scheduler']
+        self._bind_modules()
+        task_scheduler = self._task_scheduler
         current_task = task_scheduler.get_current_task()
         
         if current_task:
@@ -200,7 +191,8 @@ class HotkeySystem:
         """跳過當前任務"""
         self.logger.info("快捷鍵觸發: 跳過當前任務")
         
-        task_scheduler = self.core_engine.modules['task_scheduler']
+        self._bind_modules()
+        task_scheduler = self._task_scheduler
         current_task = task_scheduler.get_current_task()
         
         if current_task:
@@ -214,13 +206,13 @@ class HotkeySystem:
         """強制刷新檢測"""
         self.logger.info("快捷鍵觸發: 強制刷新檢測")
         
+        self._bind_modules()
+        
         # 強制刷新屏幕圖像
-        image_detector = self.core_engine.modules['image_detector']
-        screen_image = image_detector.get_screen_image(force_refresh=True)
+        screen_image = self._image_detector.get_screen_image(force_refresh=True)
         
         # 強制執行所有監控項檢測
-        monitor_manager = self.core_engine.modules['monitor_manager']
-        result = monitor_manager.force_check_all(screen_image)
+        result = self._monitor_manager.force_check_all(screen_image)
         
         if result:
             self._show_notification("刷新檢測", "檢測到異常情況並處理")
@@ -244,11 +236,13 @@ class HotkeySystem:
         Returns:
             str: 狀態信息
         """
+        self._bind_modules()
+        
         # 獲取遊戲狀態
-        game_status = self.core_engine.modules['game_manager'].current_status.name
+        game_status = self._game_manager.current_status.name
         
         # 獲取當前任務
-        task_scheduler = self.core_engine.modules['task_scheduler']
+        task_scheduler = self._task_scheduler
         current_task = task_scheduler.get_current_task()
         task_info = f"{current_task.name}" if current_task else "無"
         
@@ -279,12 +273,27 @@ class HotkeySystem:
         if not self.notification_enabled:
             return
         
-        # 在單獨的線程中顯示通知，避免阻塞主線程
-        threading.Thread(
-            target=self._show_notification_thread,
-            args=(title, message, priority),
-            daemon=True
-        ).start()
+        # 投入通知隊列由常駐線程顯示，避免阻塞調用方；
+        # 隊列滿時丟棄最舊的通知
+        try:
+            self._notify_q.put_nowait((title, message, priority))
+        except queue.Full:
+            try:
+                self._notify_q.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._notify_q.put_nowait((title, message, priority))
+            except queue.Full:
+                pass
+    
+    def _notify_worker(self):
+        """通知線程主循環：依序顯示隊列中的通知"""
+        while True:
+            item = self._notify_q.get()
+            if item is None:
+                break
+            self._show_notification_thread(*item)
     
     def _show_notification_thread(self, title, message, priority):
         """在線程中顯示通知
@@ -317,8 +326,18 @@ class HotkeySystem:
         """關閉快捷鍵系統"""
         self.logger.info("關閉快捷鍵系統")
         
-        # 解除所有註冊的快捷鍵
-        try:
-            keyboard.unhook_all()
-        except:
-            pass
\ No newline at end of file
+        # 結束通知線程
+        if self.notification_enabled:
+            try:
+                self._notify_q.put_nowait(None)
+            except queue.Full:
+                pass
+        
+        # 只解除本系統註冊的快捷鍵，
+        # 不使用unhook_all以免影響其他地方註冊的鉤子
+        for handle in self._hotkey_handles:
+            try:
+                keyboard.remove_hotkey(handle)
+            except (KeyError, ValueError):
+                pass
+        self._hotkey_handles = []
\ No newline at end of file
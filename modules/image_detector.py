@@ -8,12 +8,61 @@
 
 import os
 import time
+import zlib
 import logging
+import threading
+from collections import OrderedDict
 import numpy as np
 import cv2
 import pyautogui
 from PIL import Image, ImageGrab
 
+# DXGI桌面複製截圖後端（可選）：直接返回BGR numpy數組，
+# 省去PIL BitBlt路徑的PIL→numpy→cvtColor三次全幀拷貝，截圖延遲低數倍
+try:
+    import dxcam
+    DXCAM_AVAILABLE = True
+except ImportError:
+    dxcam = None
+    DXCAM_AVAILABLE = False
+
+# 硬件CRC32C（可選）：幀哈希走SSE4.2/NEON的CRC指令，
+# 未安裝時退回zlib的軟件CRC32（哈希輸入已降採樣，兩者都夠快）
+try:
+    import google_crc32c
+except ImportError:
+    google_crc32c = None
+
+
+def _hash_frame_bytes(data):
+    """計算幀內容哈希（優先硬件CRC32C）
+
+    Args:
+        data (bytes): 幀的（降採樣）字節串
+
+    Returns:
+        int: 哈希值
+    """
+    if google_crc32c is not None:
+        return google_crc32c.value(data)
+    return zlib.crc32(data)
+
+# 金字塔粗篩參數：降採樣倍率（兩次pyrDown）、
+# 適用的最小模板邊長、粗篩閾值的放寬量與候選區域數量上限
+PYRAMID_SCALE = 4
+PYRAMID_MIN_TEMPLATE = 32
+PYRAMID_THRESHOLD_MARGIN = 0.1
+PYRAMID_MAX_CANDIDATES = 8
+# 確認區域在候選點周圍的邊距：
+# 粗篩定位誤差約為降採樣倍率，再加少量pyrDown模糊偏移
+PYRAMID_CONFIRM_MARGIN = PYRAMID_SCALE * 2
+# 匹配結果記憶緩存的容量與屏幕哈希的降採樣步長
+MATCH_CACHE_SIZE = 256
+MATCH_CACHE_HASH_STEP = 16
+# 非極大值抑制處理的候選點上限：
+# 閾值偏低時超閾值像素可能數以萬計，只保留分數最高的一批
+MAX_NMS_CANDIDATES = 512
+
 class ImageDetector:
     """圖像識別器類，提供屏幕截圖和模板匹配功能"""
     
@@ -26,17 +75,66 @@ class ImageDetector:
         self.config = config
         self.logger = logging.getLogger("ImageDetector")
         
-        # 圖像緩存
-        self.image_cache = {}
+        # 圖像緩存：LRU、容量受限，
+        # 長期運行時動態加載的模板不會讓緩存無界增長
+        self.image_cache = OrderedDict()
+        self.template_cache_size = \
+            config['image_detection'].get('template_cache_size', 128)
+
+        # 透明模板的匹配遮罩（與image_cache同鍵）：
+        # 匹配時只計入不透明像素，不必把透明區預乘成黑底
+        self.template_masks = {}
+
+        # 金字塔粗篩緩存：模板的降採樣版本與當前幀的降採樣屏幕
+        self.template_pyramids = {}
+        self._small_screen_entry = None
+
+        # 匹配用的臨時緩衝區（結果矩陣與區域裁剪）按線程各自持有：
+        # find_template可能同時從主循環與refresh_detection等
+        # 背景線程進入，共用緩衝區會讓兩次matchTemplate互相覆寫
+        self._scratch = threading.local()
+
+        # 匹配結果記憶緩存：屏幕未變化時同一模板的匹配直接返回上次結果
+        # （監控項輪詢頻率高於屏幕刷新時，matchTemplate退化為字典查找）；
+        # OrderedDict的命中移位與逐出不是線程安全操作，讀寫都需持鎖
+        self._match_cache = OrderedDict()
+        self._match_cache_lock = threading.Lock()
+        # 同一幀的內容哈希只算一次（同_small_screen_entry的幀內緩存模式）
+        # 注意：幀內緩存均以(源幀引用, 派生值)元組整體讀寫——
+        # 單看id可能因對象回收後地址重用而誤命中，
+        # 分開存放兩個屬性則可能在並發下讀到另一幀的派生值
+        self._screen_hash_entry = None
+
+        # DXGI截圖後端：可用時建立持久的桌面複製會話
+        self._camera = None
+        if DXCAM_AVAILABLE:
+            try:
+                self._camera = dxcam.create(output_color="BGR")
+            except Exception as e:
+                self.logger.warning(f"初始化DXGI截圖後端失敗，改用PIL截圖: {str(e)}")
         
         # 屏幕相關
         self.last_screen_image = None
         self.last_full_screen_time = 0
+        # 幀鎖定深度：大於0時截圖請求一律共用已鎖定的幀（見begin_frame）
+        self._frame_pin_depth = 0
+        # 新幀事件：每次全屏截圖更新時觸發，
+        # 等待模板的循環以此喚醒而非固定休眠
+        self._frame_event = threading.Event()
         self.screen_refresh_interval = config['image_detection']['screen_refresh_interval']
         
+        # 灰度匹配（可選）：單通道匹配比三通道BGR少2/3的計算量，
+        # 對依賴顏色區分的模板不適用，故默認關閉
+        self.use_grayscale = config['image_detection'].get('use_grayscale', False)
+        self.template_grays = {}
+        self._gray_screen_entry = None
+
         # 匹配閾值
         self.default_threshold = config['image_detection']['default_threshold']
         self.thresholds = config['image_detection'].get('thresholds', {})
+        # 按模板路徑記憶閾值解析結果：
+        # 配置中的閾值鍵以子串匹配模板路徑，掃描一次後即O(1)查找
+        self._threshold_map = {}
         
         # 確保圖像目錄存在
         self.base_dir = os.path.dirname(os.path.dirname(__file__))
@@ -53,9 +151,11 @@ class ImageDetector:
         Returns:
             numpy.ndarray: 模板圖像
         """
-        # 檢查是否已緩存
-        if template_path in self.image_cache:
-            return self.image_cache[template_path]
+        # 檢查是否已緩存（命中時更新LRU順序）
+        cached = self.image_cache.get(template_path)
+        if cached is not None:
+            self.image_cache.move_to_end(template_path)
+            return cached
         
         # 構建完整路徑
         full_path = os.path.join(self.images_dir, template_path)
@@ -68,23 +168,32 @@ class ImageDetector:
                 self.logger.error(f"無法加載模板圖像: {full_path}")
                 return None
             
-            # 如果圖像有Alpha通道，則處理透明度
+            # 如果圖像有Alpha通道，則以遮罩處理透明度：
+            # 模板像素保持原樣，matchTemplate只對不透明像素計算相關性，
+            # 分數比預乘黑底乾淨（可用更高閾值）
+            pyramid_source = None
             if template.shape[2] == 4:
-                # 分離BGR和Alpha通道
-                bgr = template[:, :, 0:3]
-                alpha = template[:, :, 3]
-                
-                # 創建Alpha遮罩
-                alpha_mask = alpha / 255.0
-                
-                # 處理透明背景
-                for c in range(0, 3):
-                    bgr[:, :, c] = bgr[:, :, c] * alpha_mask
-                
-                template = bgr
+                alpha3 = cv2.cvtColor(template[:, :, 3], cv2.COLOR_GRAY2BGR)
+                template = np.ascontiguousarray(template[:, :, :3])
+                self.template_masks[template_path] = alpha3
+                # 粗篩金字塔不支持遮罩，仍用預乘黑底版本
+                # （配合放寬的粗篩誤差預算，與原行為一致）
+                pyramid_source = cv2.multiply(template, alpha3,
+                                              scale=1.0 / 255.0, dtype=cv2.CV_8U)
             
-            # 緩存模板
+            # 緩存模板，並預先建立降採樣的灰度版本供金字塔粗篩使用
+            # （粗篩只做剔除，單通道即可，比三通道少2/3的計算與帶寬）
             self.image_cache[template_path] = template
+            if min(template.shape[:2]) >= PYRAMID_MIN_TEMPLATE:
+                self.template_pyramids[template_path] = self._build_small_gray(
+                    template if pyramid_source is None else pyramid_source)
+            
+            # 超過容量時逐出最久未使用的模板及其派生緩存
+            while len(self.image_cache) > self.template_cache_size:
+                evicted_path, _ = self.image_cache.popitem(last=False)
+                self.template_pyramids.pop(evicted_path, None)
+                self.template_masks.pop(evicted_path, None)
+                self.template_grays.pop(evicted_path, None)
             
             return template
         
@@ -92,6 +201,26 @@ class ImageDetector:
             self.logger.error(f"加載模板圖像時出錯: {str(e)}")
             return None
     
+    def _grab_full_screen(self):
+        """截取全屏圖像（BGR格式）
+
+        優先走DXGI桌面複製；桌面無更新時複製會話返回None，
+        此時沿用上一幀（相當於免費的刷新門檻）。
+
+        Returns:
+            numpy.ndarray: 全屏BGR圖像
+        """
+        if self._camera is not None:
+            frame = self._camera.grab()
+            if frame is not None:
+                return frame
+            if self.last_screen_image is not None:
+                return self.last_screen_image
+
+        # PIL路徑：截圖後轉換為OpenCV格式 (BGR)
+        screenshot = ImageGrab.grab()
+        return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+
     def get_screen_image(self, region=None, force_refresh=False):
         """獲取屏幕截圖
         
@@ -115,8 +244,9 @@ class ImageDetector:
                     width = min(width, max_w - x)
                     height = min(height, max_h - y)
                     if width > 0 and height > 0:
-                        # 從全屏圖像裁剪
-                        return self.last_screen_image[y:y+height, x:x+width].copy()
+                        # 從全屏圖像裁剪；幀鎖定期間返回視圖避免拷貝
+                        crop = self.last_screen_image[y:y+height, x:x+width]
+                        return crop if self._frame_pin_depth > 0 else crop.copy()
             except Exception as e:
                 self.logger.warning(f"從全屏截圖裁剪時出錯: {str(e)}")
         
@@ -124,52 +254,51 @@ class ImageDetector:
         need_refresh = (
             force_refresh or 
             self.last_screen_image is None or 
-            (current_time - self.last_full_screen_time) > self.screen_refresh_interval
+            (self._frame_pin_depth == 0 and
+             (current_time - self.last_full_screen_time) > self.screen_refresh_interval)
         )
         
         if need_refresh:
             try:
-                # 使用PIL進行截圖
-                if region:
-                    screenshot = ImageGrab.grab(bbox=region)
-                else:
-                    screenshot = ImageGrab.grab()
-                
-                # 轉換為OpenCV格式 (BGR)
-                screen_image = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-                
-                # 如果是全屏截圖，則更新緩存
-                if not region:
-                    self.last_screen_image = screen_image
-                    self.last_full_screen_time = current_time
+                # 統一走全屏截圖並更新緩存，區域請求以切片裁剪
+                screen_image = self._grab_full_screen()
+                self.last_screen_image = screen_image
+                self.last_full_screen_time = current_time
+                self._frame_event.set()
                 
+                if region:
+                    x, y, width, height = region
+                    return screen_image[y:y+height, x:x+width].copy()
                 return screen_image
             
             except Exception as e:
                 self.logger.error(f"獲取屏幕截圖時出錯: {str(e)}")
                 return None
         
-        # 如果不需要刷新且請求全屏，則返回緩存的全屏圖像
-        elif not region:
-            return self.last_screen_image
-        
-        # 如果不需要刷新但請求區域，則進行全屏截圖並裁剪
-        else:
-            try:
-                # 更新全屏截圖
-                screenshot = ImageGrab.grab()
-                self.last_screen_image = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-                self.last_full_screen_time = current_time
-                
-                # 裁剪區域
-                x, y, width, height = region
-                return self.last_screen_image[y:y+height, x:x+width].copy()
-            
-            except Exception as e:
-                self.logger.error(f"獲取區域截圖時出錯: {str(e)}")
-                return None
+        # 不需要刷新時返回緩存的全屏圖像
+        return self.last_screen_image
     
-    def find_template(self, template_path, threshold=None, region=None, max_results=1):
+    def begin_frame(self):
+        """鎖定當前幀
+
+        抓取一張新的全屏幀並鎖定：在配對的end_frame之前，
+        所有截圖請求（force_refresh除外）共用這一張幀，
+        即使超過刷新間隔也不重新抓取，區域請求以視圖裁剪。
+
+        僅適用於純檢測階段——期間若有點擊等操作改變畫面，
+        鎖定的幀不會反映變化。支持嵌套調用。
+        """
+        if self._frame_pin_depth == 0:
+            self.get_screen_image(force_refresh=True)
+        self._frame_pin_depth += 1
+
+    def end_frame(self):
+        """解除begin_frame的幀鎖定"""
+        if self._frame_pin_depth > 0:
+            self._frame_pin_depth -= 1
+
+    def find_template(self, template_path, threshold=None, region=None, max_results=1,
+                      screen_image=None):
         """查找模板
         
         Args:
@@ -177,6 +306,8 @@ class ImageDetector:
             threshold (float, optional): 匹配閾值
             region (tuple, optional): 搜索區域 (x, y, width, height)
             max_results (int, optional): 最大返回結果數
+            screen_image (numpy.ndarray, optional): 已截取的全屏圖像；
+                提供時直接使用，不再重新截圖
             
         Returns:
             list: 匹配位置列表 [(x, y), ...]
@@ -187,68 +318,441 @@ class ImageDetector:
             self.logger.error(f"模板加載失敗: {template_path}")
             return []
         
-        # 獲取屏幕圖像
-        screen = self.get_screen_image(region)
+        # 獲取屏幕圖像：外部已提供當前幀時直接使用，避免重複截圖
+        if screen_image is not None:
+            if region:
+                x, y, width, height = region
+                screen = self._contiguous_crop(
+                    screen_image[y:y+height, x:x+width])
+            else:
+                screen = screen_image
+        else:
+            screen = self.get_screen_image(region)
         if screen is None:
             self.logger.error("獲取屏幕截圖失敗")
             return []
         
         # 決定匹配閾值
         if threshold is None:
-            # 檢查是否有特定模板的閾值設置
+            threshold = self._resolve_threshold(template_path)
+        
+        # 確保模板不大於屏幕
+        if template.shape[0] > screen.shape[0] or template.shape[1] > screen.shape[1]:
+            self.logger.warning(f"模板大小 {template.shape[:2]} 大於屏幕區域 {screen.shape[:2]}")
+            return []
+
+        # 記憶緩存：同一幀（按內容哈希）對同一模板的查詢直接命中。
+        # region來自配置時是YAML列表，統一轉為元組才能作為緩存鍵；
+        # 緩存查詢放在try之外，緩存管道自身的錯誤直接拋出，
+        # 不會被當作「無匹配」吞掉
+        region_key = tuple(region) if region is not None else None
+        cache_key = (template_path, region_key, threshold, max_results,
+                     self._screen_cache_key(screen))
+        with self._match_cache_lock:
+            cached = self._match_cache.get(cache_key)
+            if cached is not None:
+                self._match_cache.move_to_end(cache_key)
+                return list(cached)
+
+        try:
+            # 先嘗試金字塔粗篩（降採樣匹配後只在候選區域做原解析度確認），
+            # 模板太小等不適用情況返回None，退回直接全圖匹配
+            mask = self.template_masks.get(template_path)
+
+            # 啟用灰度匹配時以單通道圖像進行
+            # （帶遮罩的透明模板保持BGR，遮罩為三通道）
+            if self.use_grayscale and mask is None:
+                screen = self._get_gray_screen(screen)
+                template = self._get_gray_template(template_path, template)
+
+            locations = self._match_pyramid(screen, template, template_path,
+                                            threshold, region, max_results, mask)
+            if locations is None:
+                locations = self._match_direct(screen, template, threshold,
+                                               region, max_results, mask)
+
+            with self._match_cache_lock:
+                self._match_cache[cache_key] = list(locations)
+                if len(self._match_cache) > MATCH_CACHE_SIZE:
+                    self._match_cache.popitem(last=False)
+            return locations
+
+        except Exception as e:
+            self.logger.error(f"查找模板時出錯: {str(e)}")
+            return []
+
+    def _contiguous_crop(self, crop):
+        """把區域裁剪視圖複製進重用的連續緩衝區
+
+        Args:
+            crop (numpy.ndarray): 全屏幀的切片視圖
+
+        Returns:
+            numpy.ndarray: 連續內存的裁剪圖像
+        """
+        if crop.ndim != 3:
+            return np.ascontiguousarray(crop)
+
+        h, w = crop.shape[:2]
+        buf = getattr(self._scratch, 'region_buf', None)
+        if buf is None or buf.shape[0] < h or buf.shape[1] < w:
+            buf = np.empty(
+                (max(h, buf.shape[0] if buf is not None else 0),
+                 max(w, buf.shape[1] if buf is not None else 0), 3),
+                dtype=crop.dtype
+            )
+            self._scratch.region_buf = buf
+        view = buf[:h, :w]
+        np.copyto(view, crop)
+        return view
+
+    def _resolve_threshold(self, template_path):
+        """解析模板的匹配閾值（按路徑記憶）
+
+        Args:
+            template_path (str): 模板路徑
+
+        Returns:
+            float: 匹配閾值
+        """
+        threshold = self._threshold_map.get(template_path)
+        if threshold is None:
+            # 檢查是否有特定模板的閾值設置，否則使用默認閾值
+            threshold = self.default_threshold
             for key, value in self.thresholds.items():
                 if key in template_path:
                     threshold = value
                     break
-            # 否則使用默認閾值
-            if threshold is None:
-                threshold = self.default_threshold
-        
-        try:
-            # 確保模板不大於屏幕
-            if template.shape[0] > screen.shape[0] or template.shape[1] > screen.shape[1]:
-                self.logger.warning(f"模板大小 {template.shape[:2]} 大於屏幕區域 {screen.shape[:2]}")
+            self._threshold_map[template_path] = threshold
+        return threshold
+
+    def _screen_cache_key(self, screen):
+        """計算屏幕圖像的內容哈希（記憶緩存鍵的一部分）
+
+        全屏圖像按固定步長降採樣後再哈希，
+        哈希成本維持在數十KB級；碰撞僅導致一次多餘或過期的匹配，無害。
+
+        Args:
+            screen (numpy.ndarray): 屏幕圖像
+
+        Returns:
+            int: 內容哈希值
+        """
+        # 小圖（區域裁剪）直接整張哈希；全屏圖先確認幀內緩存，
+        # 未命中才按固定步長降採樣後哈希，同一幀多個模板共用同一哈希
+        if screen.size < 200_000:
+            return _hash_frame_bytes(screen.tobytes())
+
+        entry = self._screen_hash_entry
+        if entry is None or entry[0] is not screen:
+            step = MATCH_CACHE_HASH_STEP
+            entry = (screen, _hash_frame_bytes(
+                screen[::step, ::step].tobytes()))
+            self._screen_hash_entry = entry
+        return entry[1]
+
+    def _result_view(self, result_h, result_w):
+        """獲取匹配結果緩衝區的視圖（按需擴容）
+
+        cv2.matchTemplate每次調用都會分配(W-w+1)x(H-h+1)的float32矩陣，
+        全屏匹配時約8MB；傳入預分配的緩衝區可讓OpenCV原地寫入。
+
+        Args:
+            result_h (int): 結果矩陣高度
+            result_w (int): 結果矩陣寬度
+
+        Returns:
+            numpy.ndarray: 指定大小的float32緩衝區視圖
+        """
+        buf = getattr(self._scratch, 'result_buf', None)
+        if buf is None or buf.shape[0] < result_h or buf.shape[1] < result_w:
+            buf = np.empty(
+                (max(result_h, buf.shape[0] if buf is not None else 0),
+                 max(result_w, buf.shape[1] if buf is not None else 0)),
+                dtype=np.float32
+            )
+            self._scratch.result_buf = buf
+        return buf[:result_h, :result_w]
+
+    def _masked_match(self, image, template, mask):
+        """對圖像執行帶遮罩的歸一化相關匹配
+
+        Args:
+            image (numpy.ndarray): 被搜索圖像
+            template (numpy.ndarray): 模板圖像
+            mask (numpy.ndarray): 遮罩，None時為普通匹配
+
+        Returns:
+            numpy.ndarray: 匹配結果矩陣
+        """
+        result = self._result_view(image.shape[0] - template.shape[0] + 1,
+                                   image.shape[1] - template.shape[1] + 1)
+        if mask is None:
+            return cv2.matchTemplate(image, template,
+                                     cv2.TM_CCOEFF_NORMED, result=result)
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED,
+                                   result=result, mask=mask)
+        # 遮罩匹配在平坦區域可能產生NaN/inf，統一視為不匹配
+        np.nan_to_num(result, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        return result
+
+    def _match_direct(self, screen, template, threshold, region, max_results,
+                      mask=None):
+        """在整個屏幕圖像上直接進行模板匹配
+
+        Args:
+            screen (numpy.ndarray): 屏幕圖像
+            template (numpy.ndarray): 模板圖像
+            threshold (float): 匹配閾值
+            region (tuple, optional): 搜索區域（用於偏移結果坐標）
+            max_results (int): 最大返回結果數
+            mask (numpy.ndarray, optional): 透明模板的匹配遮罩
+
+        Returns:
+            list: 匹配位置列表 [(x, y), ...]
+        """
+        # 進行模板匹配（寫入重用的結果緩衝區）
+        h, w = template.shape[:2]
+        result = self._masked_match(screen, template, mask)
+
+        # 查找匹配位置：單結果時minMaxLoc一次掃描即可
+        if max_results == 1:
+            _, max_val, _, max_loc = cv2.minMaxLoc(result)
+            if max_val < threshold:
                 return []
-            
-            # 進行模板匹配
-            result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
-            
-            # 查找匹配位置
-            locations = []
-            h, w = template.shape[:2]
-            
-            while len(locations) < max_results:
-                min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-                
-                if max_val >= threshold:
-                    # 計算中心位置
-                    center_x = max_loc[0] + w // 2
-                    center_y = max_loc[1] + h // 2
-                    
-                    # 添加區域偏移
-                    if region:
-                        center_x += region[0]
-                        center_y += region[1]
-                    
-                    locations.append((center_x, center_y))
-                    
-                    # 在結果中去除該匹配區域以找到下一個匹配
-                    if len(locations) < max_results:
-                        cv2.rectangle(
-                            result, 
-                            max_loc, 
-                            (max_loc[0] + w, max_loc[1] + h), 
-                            (0, 0, 0), 
-                            -1
-                        )
-                else:
+            picked = [max_loc]
+        else:
+            # 多結果時一次向量化掃描取出全部候選點，
+            # 再按分數做非極大值抑制；
+            # 取代舊的「每找到一個匹配就minMaxLoc+rectangle全圖重掃」循環
+            ys, xs = np.where(result >= threshold)
+            if len(xs) == 0:
+                return []
+            scores = result[ys, xs]
+            order = np.argsort(-scores)
+            # 限制進入抑制循環的候選數量，避免低閾值時退化為平方級掃描
+            if len(order) > MAX_NMS_CANDIDATES:
+                order = order[:MAX_NMS_CANDIDATES]
+
+            # 向量化非極大值抑制：每選定一個峰值，
+            # 一次屏蔽其模板範圍內的其餘候選，
+            # 取代逐候選×逐已選點的Python比較循環
+            xs_o = xs[order].astype(np.int64)
+            ys_o = ys[order].astype(np.int64)
+            alive = np.ones(len(order), dtype=bool)
+            picked = []
+            while len(picked) < max_results:
+                remaining = np.flatnonzero(alive)
+                if remaining.size == 0:
                     break
-            
-            return locations
-        
-        except Exception as e:
-            self.logger.error(f"查找模板時出錯: {str(e)}")
+                i = remaining[0]
+                x = int(xs_o[i])
+                y = int(ys_o[i])
+                picked.append((x, y))
+                alive &= (np.abs(xs_o - x) >= w) | (np.abs(ys_o - y) >= h)
+
+        # 換算為中心坐標並添加區域偏移
+        locations = []
+        for x, y in picked:
+            center_x = x + w // 2
+            center_y = y + h // 2
+            if region:
+                center_x += region[0]
+                center_y += region[1]
+            locations.append((center_x, center_y))
+
+        return locations
+
+    @staticmethod
+    def _build_small_gray(image):
+        """建立圖像的降採樣灰度版本（金字塔粗篩用）
+
+        Args:
+            image (numpy.ndarray): 原始圖像（BGR或灰度）
+
+        Returns:
+            numpy.ndarray: 兩次pyrDown後的灰度圖像
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return cv2.pyrDown(cv2.pyrDown(image))
+
+    def _get_gray_template(self, template_path, template):
+        """獲取模板的灰度版本（按路徑緩存）
+
+        Args:
+            template_path (str): 模板路徑（緩存鍵）
+            template (numpy.ndarray): 原始模板
+
+        Returns:
+            numpy.ndarray: 灰度模板
+        """
+        gray = self.template_grays.get(template_path)
+        if gray is None:
+            gray = template if template.ndim == 2 else \
+                cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            self.template_grays[template_path] = gray
+        return gray
+
+    def _get_gray_screen(self, screen):
+        """獲取屏幕圖像的灰度版本（同一幀內緩存）
+
+        Args:
+            screen (numpy.ndarray): 屏幕圖像
+
+        Returns:
+            numpy.ndarray: 灰度屏幕圖像
+        """
+        if screen.ndim == 2:
+            return screen
+        entry = self._gray_screen_entry
+        if entry is None or entry[0] is not screen:
+            entry = (screen, cv2.cvtColor(screen, cv2.COLOR_BGR2GRAY))
+            self._gray_screen_entry = entry
+        return entry[1]
+
+    def _get_small_template(self, template_path, template):
+        """獲取模板的降採樣灰度版本（按路徑緩存）
+
+        Args:
+            template_path (str): 模板路徑（緩存鍵）
+            template (numpy.ndarray): 原始模板
+
+        Returns:
+            numpy.ndarray: 降採樣後的灰度模板
+        """
+        small = self.template_pyramids.get(template_path)
+        if small is None:
+            small = self._build_small_gray(template)
+            self.template_pyramids[template_path] = small
+        return small
+
+    def _get_small_screen(self, screen):
+        """獲取屏幕圖像的降採樣灰度版本（同一幀內緩存）
+
+        同一輪檢測中多個監控項共用同一幀時，
+        降採樣只需做一次。
+
+        Args:
+            screen (numpy.ndarray): 屏幕圖像
+
+        Returns:
+            numpy.ndarray: 降採樣後的屏幕圖像
+        """
+        entry = self._small_screen_entry
+        if entry is None or entry[0] is not screen:
+            entry = (screen, self._build_small_gray(screen))
+            self._small_screen_entry = entry
+        return entry[1]
+
+    def _match_pyramid(self, screen, template, template_path, threshold, region,
+                       max_results, mask=None):
+        """金字塔粗篩匹配：先在降採樣圖像上定位候選區域，再原解析度確認
+
+        Args:
+            screen (numpy.ndarray): 屏幕圖像
+            template (numpy.ndarray): 模板圖像
+            template_path (str): 模板路徑
+            threshold (float): 匹配閾值
+            region (tuple, optional): 搜索區域（用於偏移結果坐標）
+            max_results (int): 最大返回結果數
+            mask (numpy.ndarray, optional): 透明模板的匹配遮罩（確認階段用）
+
+        Returns:
+            list: 匹配位置列表；不適用金字塔粗篩時返回None
+        """
+        h, w = template.shape[:2]
+
+        # 多結果查詢不走粗篩：重疊的候選區域會被合併，
+        # 每個合併區域只確認一個峰值，緊密排列的列表項
+        # （申請者、勾選框）會整列塌縮成單個匹配
+        if max_results > 1:
+            return None
+
+        # 模板太小時降採樣後特徵不足，不做粗篩
+        if min(h, w) < PYRAMID_MIN_TEMPLATE:
+            return None
+
+        small_template = self._get_small_template(template_path, template)
+        small_screen = self._get_small_screen(screen)
+        if small_template.shape[0] > small_screen.shape[0] or \
+                small_template.shape[1] > small_screen.shape[1]:
+            return None
+
+        # 降採樣匹配：粗篩只負責剔除無關區域，用uint8上的平方差（SQDIFF）
+        # 取代歸一化相關——省去均值和歸一化計算，走OpenCV的整數SIMD路徑；
+        # 閾值換算為允許的總誤差量並略微放寬以容忍降採樣損失
+        result = cv2.matchTemplate(
+            small_screen, small_template, cv2.TM_SQDIFF,
+            result=self._result_view(
+                small_screen.shape[0] - small_template.shape[0] + 1,
+                small_screen.shape[1] - small_template.shape[1] + 1)
+        )
+        coarse_threshold = max(threshold - PYRAMID_THRESHOLD_MARGIN, 0.5)
+        pixel_count = small_template.shape[0] * small_template.shape[1]
+        if small_template.ndim == 3:
+            pixel_count *= small_template.shape[2]
+        sqdiff_limit = (1.0 - coarse_threshold) * pixel_count * 255.0 * 255.0
+        ys, xs = np.where(result <= sqdiff_limit)
+
+        if len(xs) == 0:
             return []
+
+        # 候選過多時粗篩沒有意義，退回直接匹配
+        if len(xs) > PYRAMID_MAX_CANDIDATES * 4:
+            return None
+
+        # 將候選點換算回原解析度並以小邊距擴展為確認矩形：
+        # 粗篩定位已精確到降採樣倍率內，
+        # 邊距只需覆蓋量化誤差，確認匹配面積貼近模板本身
+        screen_h, screen_w = screen.shape[:2]
+        margin = PYRAMID_CONFIRM_MARGIN
+        rects = []
+        for x, y in zip(xs, ys):
+            fx = int(x) * PYRAMID_SCALE
+            fy = int(y) * PYRAMID_SCALE
+            x0 = max(fx - margin, 0)
+            y0 = max(fy - margin, 0)
+            x1 = min(fx + w + margin, screen_w)
+            y1 = min(fy + h + margin, screen_h)
+
+            # 合併重疊的候選矩形
+            for rect in rects:
+                if x0 < rect[2] and rect[0] < x1 and y0 < rect[3] and rect[1] < y1:
+                    rect[0] = min(rect[0], x0)
+                    rect[1] = min(rect[1], y0)
+                    rect[2] = max(rect[2], x1)
+                    rect[3] = max(rect[3], y1)
+                    break
+            else:
+                rects.append([x0, y0, x1, y1])
+
+        if len(rects) > PYRAMID_MAX_CANDIDATES:
+            return None
+
+        # 在每個候選區域內做原解析度確認
+        candidates = []
+        for x0, y0, x1, y1 in rects:
+            roi = screen[y0:y1, x0:x1]
+            if roi.shape[0] < h or roi.shape[1] < w:
+                continue
+            roi_result = self._masked_match(roi, template, mask)
+            min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(roi_result)
+            if max_val >= threshold:
+                candidates.append((max_val, x0 + max_loc[0], y0 + max_loc[1]))
+
+        # 按匹配度排序並換算為中心坐標
+        candidates.sort(reverse=True)
+        locations = []
+        for _, match_x, match_y in candidates[:max_results]:
+            center_x = match_x + w // 2
+            center_y = match_y + h // 2
+            if region:
+                center_x += region[0]
+                center_y += region[1]
+            locations.append((center_x, center_y))
+
+        return locations
     
     def wait_for_template(self, template_path, timeout=10, threshold=None, region=None):
         """等待模板出現
@@ -264,15 +768,22 @@ class ImageDetector:
         """
         start_time = time.time()
         
-        while (time.time() - start_time) < timeout:
+        while True:
             match = self.find_template(template_path, threshold, region)
             
             if match:
                 self.logger.debug(f"在 {time.time() - start_time:.2f} 秒後找到模板 {template_path}")
                 return match[0]
             
-            # 短暫休眠以減少CPU使用
-            time.sleep(0.2)
+            remaining = timeout - (time.time() - start_time)
+            if remaining <= 0:
+                break
+            
+            # 等待新幀事件喚醒；最多等待一個刷新間隔以驅動重新截圖，
+            # 其他線程更新屏幕時立即重新檢測而非等滿固定休眠
+            self._frame_event.wait(
+                min(remaining, max(self.screen_refresh_interval, 0.05)))
+            self._frame_event.clear()
         
         self.logger.warning(f"等待模板 {template_path} 超時，已等待 {timeout} 秒")
         return None
@@ -293,8 +804,9 @@ class ImageDetector:
         """
         results = {}
         
-        # 獲取區域屏幕截圖
-        screen = self.get_screen_image(region)
+        # 只截取一次全屏，批次內所有模板共用同一幀：
+        # 屏幕讀取成本攤分到全部模板上，連續匹配時屏幕數據保持在緩存中
+        screen = self.get_screen_image()
         if screen is None:
             self.logger.error("獲取屏幕截圖失敗")
             return results
@@ -304,7 +816,8 @@ class ImageDetector:
             threshold = config.get("threshold", self.default_threshold)
             max_results = config.get("max_results", 10)
             
-            matches = self.find_template(template_path, threshold, region, max_results)
+            matches = self.find_template(template_path, threshold, region,
+                                         max_results, screen_image=screen)
             if matches:
                 results[name] = matches
         
@@ -314,5 +827,14 @@ class ImageDetector:
         """清理圖像緩存"""
         self.logger.debug("清理圖像緩存")
         self.image_cache.clear()
+        self.template_masks.clear()
+        self.template_pyramids.clear()
+        self._small_screen_entry = None
+        self._scratch = threading.local()
+        with self._match_cache_lock:
+            self._match_cache.clear()
+        self._screen_hash_entry = None
+        self.template_grays.clear()
+        self._gray_screen_entry = None
         self.last_screen_image = None
         self.last_full_screen_time = 0
\ No newline at end of file
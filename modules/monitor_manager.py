@@ -7,9 +7,15 @@
 """
 
 import time
+import bisect
 import logging
 import threading
 
+# 計時合併比例：當本輪已有監控項到期時，
+# 剩餘時間不足間隔此比例的監控項提前併入本輪檢測，
+# 使多個監控項共用同一幀屏幕的降採樣結果
+MONITOR_COALESCE_RATIO = 0.2
+
 class Monitor:
     """監控項類定義"""
     def __init__(self, name, priority, handler, patterns=None, check_interval=10):
@@ -37,12 +43,22 @@ class Monitor:
         Returns:
             bool: 是否應該執行
         """
+        return self.due_in(time.time()) <= 0
+
+    def due_in(self, now):
+        """距離下次檢測的剩餘時間
+
+        Args:
+            now (float): 當前時間戳
+
+        Returns:
+            float: 剩餘秒數，已到期為負值；不活躍時為無窮大
+        """
         # 如果不活躍則不檢測
         if not self.is_active:
-            return False
-        
-        # 檢查間隔時間
-        return (time.time() - self.last_check_time) >= self.check_interval
+            return float('inf')
+
+        return self.check_interval - (now - self.last_check_time)
 
 class MonitorManager:
     """監控管理器類"""
@@ -50,6 +66,10 @@ class MonitorManager:
         """初始化監控管理器"""
         self.logger = logging.getLogger("MonitorManager")
         self.global_monitors = []  # 全局監控項列表
+        # 監控列表的只讀快照（寫時複製）：
+        # 檢測掃描用快照進行，增刪監控項只需短暫持鎖重建快照，
+        # 不會被長時間運行的處理器阻塞
+        self._monitors_snapshot = ()
         self.is_paused = False  # 是否暫停
         self.lock = threading.Lock()  # 線程鎖
         
@@ -75,12 +95,13 @@ class MonitorManager:
                     self.logger.warning(f"已存在名為 '{name}' 的監控項，無法添加")
                     return None
             
-            # 創建新監控項
+            # 創建新監控項，按優先級降序插入
+            # （列表始終有序，插入時無需整體重排）並重建只讀快照
             monitor = Monitor(name, priority, handler, patterns, check_interval)
-            self.global_monitors.append(monitor)
-            
-            # 按優先級排序監控列表
-            self.global_monitors.sort(key=lambda m: m.priority, reverse=True)
+            keys = [-m.priority for m in self.global_monitors]
+            index = bisect.bisect_right(keys, -priority)
+            self.global_monitors.insert(index, monitor)
+            self._monitors_snapshot = tuple(self.global_monitors)
             
             self.logger.info(f"添加監控項 '{name}' (優先級: {priority})")
             return monitor
@@ -98,8 +119,9 @@ class MonitorManager:
             # 查找監控項
             for i, monitor in enumerate(self.global_monitors):
                 if monitor.name == name:
-                    # 移除監控項
+                    # 移除監控項並重建只讀快照
                     self.global_monitors.pop(i)
+                    self._monitors_snapshot = tuple(self.global_monitors)
                     self.logger.info(f"移除監控項 '{name}'")
                     return True
             
@@ -108,15 +130,14 @@ class MonitorManager:
     
     def pause_global_monitoring(self):
         """暫停所有監控"""
-        with self.lock:
-            self.is_paused = True
-            self.logger.info("全局監控已暫停")
+        # 單個布爾屬性的寫入在GIL下本身是原子的，無需持鎖
+        self.is_paused = True
+        self.logger.info("全局監控已暫停")
     
     def resume_global_monitoring(self):
         """恢復所有監控"""
-        with self.lock:
-            self.is_paused = False
-            self.logger.info("全局監控已恢復")
+        self.is_paused = False
+        self.logger.info("全局監控已恢復")
     
     def check_global_monitors(self, screen_image):
         """檢查所有全局監控項
@@ -131,48 +152,65 @@ class MonitorManager:
         if self.is_paused:
             return False
         
-        with self.lock:
-            current_time = time.time()
+        # 快照是不可變元組，讀取單個屬性在GIL下是原子的；
+        # 寫側（add/remove）整體替換快照，讀側無需持鎖
+        monitors = self._monitors_snapshot
+        
+        current_time = time.time()
+
+        # 若本輪沒有任何監控項到期，直接返回
+        # （到期判斷直接做屬性比較，熱循環中不經過方法調用）
+        for monitor in monitors:
+            if monitor.is_active and \
+                    current_time - monitor.last_check_time >= monitor.check_interval:
+                break
+        else:
+            return False
+
+        # 按優先級檢查所有監控項；
+        # 已有監控項到期時，臨近到期的一併提前檢測（計時合併），
+        # 讓本輪所有模板匹配共用同一幀的降採樣屏幕
+        for monitor in monitors:
+            if not monitor.is_active:
+                continue
+            remaining = monitor.check_interval - \
+                (current_time - monitor.last_check_time)
+            if remaining > monitor.check_interval * MONITOR_COALESCE_RATIO:
+                continue
             
-            # 按優先級檢查所有監控項
-            for monitor in self.global_monitors:
-                # 檢查是否應該執行檢測
-                if not monitor.should_check():
-                    continue
-                
-                # 更新最後檢查時間
-                monitor.last_check_time = current_time
-                
-                # 如果沒有模式需要檢測，則跳過
-                if not monitor.patterns:
-                    continue
-                
-                # 檢測模式
-                match_info = self._check_patterns(monitor, screen_image)
+            # 更新最後檢查時間
+            monitor.last_check_time = current_time
+            
+            # 如果沒有模式需要檢測，則跳過
+            if not monitor.patterns:
+                continue
+            
+            # 檢測模式
+            match_info = self._check_patterns(monitor, screen_image)
+            
+            # 如果有匹配，則調用處理器
+            if match_info:
+                monitor.last_match_time = current_time
                 
-                # 如果有匹配，則調用處理器
-                if match_info:
-                    monitor.last_match_time = current_time
+                try:
+                    # 調用處理函數
+                    self.logger.info("監控項 '%s' 檢測到匹配，正在處理", monitor.name)
+                    result = monitor.handler(match_info)
                     
-                    try:
-                        # 調用處理函數
-                        self.logger.info(f"監控項 '{monitor.name}' 檢測到匹配，正在處理")
-                        result = monitor.handler(match_info)
-                        
-                        if result:
-                            self.logger.info(f"監控項 '{monitor.name}' 處理成功")
-                        else:
-                            self.logger.warning(f"監控項 '{monitor.name}' 處理失敗")
-                        
-                        # 不論處理成功與否，都返回True表示找到了匹配
-                        return True
+                    if result:
+                        self.logger.info("監控項 '%s' 處理成功", monitor.name)
+                    else:
+                        self.logger.warning("監控項 '%s' 處理失敗", monitor.name)
                     
-                    except Exception as e:
-                        self.logger.error(f"監控項 '{monitor.name}' 處理異常: {str(e)}")
-                        return True  # 仍然返回True，因為發現了匹配
-            
-            # 沒有監控項發現匹配
-            return False
+                    # 不論處理成功與否，都返回True表示找到了匹配
+                    return True
+                
+                except Exception as e:
+                    self.logger.error("監控項 '%s' 處理異常: %s", monitor.name, str(e))
+                    return True  # 仍然返回True，因為發現了匹配
+        
+        # 沒有監控項發現匹配
+        return False
     
     def _check_patterns(self, monitor, screen_image):
         """檢查監控項的模式是否匹配
@@ -256,9 +294,8 @@ class MonitorManager:
         """
         monitor = self.get_monitor(name)
         if monitor:
-            with self.lock:
-                monitor.is_active = True
-                self.logger.info(f"監控項 '{name}' 已啟用")
+            monitor.is_active = True
+            self.logger.info(f"監控項 '{name}' 已啟用")
             return True
         
         self.logger.warning(f"找不到名為 '{name}' 的監控項，無法啟用")
@@ -275,9 +312,8 @@ class MonitorManager:
         """
         monitor = self.get_monitor(name)
         if monitor:
-            with self.lock:
-                monitor.is_active = False
-                self.logger.info(f"監控項 '{name}' 已禁用")
+            monitor.is_active = False
+            self.logger.info(f"監控項 '{name}' 已禁用")
             return True
         
         self.logger.warning(f"找不到名為 '{name}' 的監控項，無法禁用")
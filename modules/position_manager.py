@@ -6,12 +6,56 @@
 負責處理6個職位的申請處理和超時檢查
 """
 
+import os
+import re
 import time
 import logging
 from enum import Enum
 
+import cv2
+import numpy as np
+
+# OCR庫為可選依賴，未安裝時超時檢測退化為直接返回
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+# 任職時間的 "時:分:秒" 格式（模塊載入時編譯一次）
+TIME_PATTERN = re.compile(r'(\d+):(\d+):(\d+)')
+
+# OCR輸入的目標高度：Tesseract的推理時間與像素數成正比，
+# 數字內容縮到此高度後精度不降反升
+OCR_TARGET_HEIGHT = 32
+
+def _parse_hms_to_minutes(text):
+    """從OCR文本解析 "HH:MM:SS" 時間並轉換為總分鐘數
+
+    Args:
+        text (str): OCR識別出的文本
+
+    Returns:
+        float: 總分鐘數；無法解析時返回None
+    """
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 60 + int(minutes) + int(seconds) / 60
+
+
+# 批准申請者時，每處理多少個申請者重新用模板匹配驗證一次勾選框偏移
+CHECKBOX_REVERIFY_EVERY = 5
+
 class Position:
     """職位類定義"""
+    
+    # 固定屬性集：省去每實例的__dict__，
+    # 屬性讀寫走固定槽位，掃描循環反覆讀取的熱欄位訪問更快
+    __slots__ = ('id', 'name', 'index', 'config', 'is_enabled',
+                 'application_region', 'time_region', 'overtime_threshold',
+                 'last_processed_time', 'application_count', 'overtime_count')
+    
     def __init__(self, id, name, index, config):
         """初始化職位
         
@@ -49,6 +93,18 @@ class PositionManager:
         self.logger = logging.getLogger("PositionManager")
         self.positions = []
         self._initialize_positions(config)
+        
+        # 預載職位相關模板到圖像識別器的緩存：
+        # PNG解碼是CPU密集的zlib工作，不應在首次掃描時才逐一支付
+        self._preload_templates()
+        
+        # OCR設置在初始化時解析一次，不在每次檢測時重做
+        self._ocr_config = '--psm 7 --oem 3 -c tessedit_char_whitelist=0123456789:'
+        # 批次OCR用：多行時間拼接成一張圖，psm 6按行解析
+        self._ocr_batch_config = '--psm 6 --oem 3 -c tessedit_char_whitelist=0123456789:'
+        if pytesseract is not None and os.name == 'nt' and \
+                'ocr' in config and 'tesseract_path' in config['ocr']:
+            pytesseract.pytesseract.tesseract_cmd = config['ocr']['tesseract_path']
     
     def _initialize_positions(self, config):
         """從配置中初始化所有職位
@@ -69,13 +125,78 @@ class PositionManager:
         
         self.logger.info(f"已初始化 {len(self.positions)} 個職位")
     
+    def _preload_templates(self):
+        """預載各職位按鈕與共用UI模板到圖像識別器的緩存
+
+        識別器的模板緩存會同時預建金字塔與灰度版本，
+        預載後掃描路徑上不再發生磁盤讀取與PNG解碼。
+        """
+        template_paths = [
+            "images/ui/application_menu_icon.png",
+            "images/ui/main_menu_button.png",
+            "images/ui/application_button.png",
+            "images/ui/back_button.png",
+            "images/positions/applicant_item.png",
+            "images/positions/approve_checkbox.png",
+            "images/positions/confirm_button.png",
+            "images/positions/confirm_dismissal.png",
+        ]
+        for position in self.positions:
+            template_paths.append(
+                f"images/positions/position{position.index+1}_apply_button.png")
+            template_paths.append(
+                f"images/positions/dismiss_button{position.index+1}.png")
+        
+        for path in template_paths:
+            if self.image_detector.load_template(path) is None:
+                self.logger.warning(f"預載職位模板失敗: {path}")
+    
+    def _prescan_apply_buttons(self):
+        """在同一幀上批次檢測各職位的申請按鈕
+
+        導航到申請畫面後鎖定一張幀，對每個啟用職位的
+        application_region各做一次匹配：六次匹配共讀同一張
+        屏幕圖像，幀數據在緩存中保持熱態。
+
+        Returns:
+            set: 檢測到申請按鈕的職位ID集合；無法預掃時返回None
+        """
+        if not self._navigate_to_application_screen():
+            return None
+        
+        visible = set()
+        self.image_detector.begin_frame()
+        try:
+            for position in self.positions:
+                if not position.is_enabled:
+                    continue
+                # 未配置application_region的職位無法預掃，
+                # 一律視為可見，交由逐職位流程做全屏搜索
+                if not position.application_region:
+                    visible.add(position.id)
+                    continue
+                template_path = f"images/positions/position{position.index+1}_apply_button.png"
+                if self.image_detector.find_template(
+                        template_path, region=position.application_region):
+                    visible.add(position.id)
+        finally:
+            self.image_detector.end_frame()
+        return visible
+    
     def process_all_positions(self):
         """處理所有啟用的職位申請"""
         self.logger.info("開始處理所有職位申請")
         processed_count = 0
         
+        # 先在同一幀上預掃哪些職位有申請按鈕，
+        # 沒有按鈕的職位直接跳過整套導航與點擊流程
+        visible = self._prescan_apply_buttons()
+        
         for position in self.positions:
             if position.is_enabled:
+                if visible is not None and position.id not in visible:
+                    self.logger.debug(f"職位 '{position.name}' 預掃未見申請按鈕，跳過")
+                    continue
                 try:
                     result = self._process_single_position(position)
                     if result:
@@ -134,10 +255,23 @@ class PositionManager:
         self.logger.info("開始檢查所有職位超時情況")
         overtime_count = 0
         
+        # 先導航到職位列表畫面，再嘗試批次OCR：
+        # 全部時間區域拼成一張圖、一次識別，
+        # 每次Tesseract調用的進程啟動開銷只付一次；
+        # 未導航就取樣會裁到任意畫面——遊戲UI中到處是HH:MM:SS計時器，
+        # 錯誤畫面的時長一旦餵進罷黜判定就無法挽回。
+        # 失敗時返回None，逐職位檢測照常進行
+        overtime_map = None
+        if self._navigate_to_position_list_screen():
+            overtime_map = self._detect_all_overtime()
+        
         for position in self.positions:
             if position.is_enabled:
                 try:
-                    result = self._check_single_position_overtime(position)
+                    overtime = None if overtime_map is None \
+                        else overtime_map.get(position.id)
+                    result = self._check_single_position_overtime(
+                        position, overtime=overtime)
                     if result:
                         overtime_count += 1
                 except Exception as e:
@@ -146,11 +280,13 @@ class PositionManager:
         self.logger.info(f"超時檢查完成，處理了 {overtime_count} 個超時職位")
         return overtime_count > 0
     
-    def _check_single_position_overtime(self, position):
+    def _check_single_position_overtime(self, position, overtime=None):
         """檢查單個職位的超時情況
         
         Args:
             position (Position): 職位對象
+            overtime (bool, optional): 批次OCR預先得出的超時判定；
+                為None時在此逐職位檢測
             
         Returns:
             bool: 是否有超時處理
@@ -165,8 +301,9 @@ class PositionManager:
             self.logger.error("無法導航至職位列表畫面")
             return False
         
-        # 2. 檢測職位任職時間
-        overtime = self._detect_position_overtime(position)
+        # 2. 檢測職位任職時間（批次檢測已有結論時不再單獨OCR）
+        if overtime is None:
+            overtime = self._detect_position_overtime(position)
         if not overtime:
             self.logger.info(f"職位 '{position.name}' 沒有超時")
             return False
@@ -287,18 +424,18 @@ class PositionManager:
         if main_menu_match:
             x, y = main_menu_match[0], main_menu_match[1]
             self.action_executor.click_at(x, y)
-            time.sleep(1)  # 等待菜單打開
         
-        # 3. 點擊申請管理按鈕
+        # 3. 等待申請管理按鈕出現並點擊
+        #    （菜單通常在幾百毫秒內打開，出現即繼續，不等滿固定休眠）
         application_button_template = "images/ui/application_button.png"
-        app_button_match = self.image_detector.find_template(application_button_template)
+        app_button_match = self.image_detector.wait_for_template(
+            application_button_template, timeout=2)
         if app_button_match:
-            x, y = app_button_match[0], app_button_match[1]
+            x, y = app_button_match
             self.action_executor.click_at(x, y)
-            time.sleep(2)  # 等待頁面加載
             
             # 確認是否成功進入申請畫面
-            if self.image_detector.find_template(menu_template):
+            if self.image_detector.wait_for_template(menu_template, timeout=3):
                 self.logger.debug("成功導航至申請畫面")
                 return True
         
@@ -327,7 +464,9 @@ class PositionManager:
         if match:
             x, y = match[0], match[1]
             self.action_executor.click_at(x, y)
-            time.sleep(1)  # 等待響應
+            # 等待申請者列表出現即繼續；沒有申請者時最多等同原本的固定休眠
+            self.image_detector.wait_for_template(
+                "images/positions/applicant_item.png", timeout=1)
             self.logger.debug(f"已點擊職位 '{position.name}'")
             return True
         
@@ -371,19 +510,31 @@ class PositionManager:
         
         approved_count = 0
         
+        # 勾選框相對申請者點擊位置的偏移通常固定：
+        # 首個申請者以模板匹配定位並記下偏移，之後直接按偏移點擊，
+        # 省去每個申請者一次全屏模板匹配（本循環的主要CPU成本）；
+        # 每隔CHECKBOX_REVERIFY_EVERY個申請者重新驗證一次偏移
+        checkbox_template = "images/positions/approve_checkbox.png"
+        checkbox_offset = None
+        
         # 示例代碼:
         for i, (x, y) in enumerate(applicants):
             # 點擊申請者
             self.action_executor.click_at(x, y)
-            time.sleep(0.5)
             
-            # 尋找並點擊批准勾選框
-            checkbox_template = "images/positions/approve_checkbox.png"
-            checkbox_match = self.image_detector.find_template(checkbox_template)
+            if checkbox_offset is None or i % CHECKBOX_REVERIFY_EVERY == 0:
+                # 等待批准勾選框實際出現，而非盲目固定休眠
+                checkbox_match = self.image_detector.wait_for_template(
+                    checkbox_template, timeout=1)
+                if checkbox_match:
+                    checkbox_offset = (checkbox_match[0] - x,
+                                       checkbox_match[1] - y)
+                else:
+                    checkbox_offset = None
             
-            if checkbox_match:
-                checkbox_x, checkbox_y = checkbox_match[0], checkbox_match[1]
-                self.action_executor.click_at(checkbox_x, checkbox_y)
+            if checkbox_offset is not None:
+                self.action_executor.click_at(
+                    x + checkbox_offset[0], y + checkbox_offset[1])
                 time.sleep(0.5)
                 approved_count += 1
             
@@ -438,6 +589,117 @@ class PositionManager:
         
         return True  # 假設成功
     
+    def _prepare_ocr_image(self, image):
+        """OCR前的圖像預處理（灰度、二值化、縮放至目標高度）
+
+        Args:
+            image (numpy.ndarray): 原始截圖
+
+        Returns:
+            numpy.ndarray: 處理後的灰度圖像
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+        if not self.config.get('ocr', {}).get('preprocessing', True):
+            return image
+
+        # Otsu二值化：數字顯示為高對比內容，二值化後OCR更穩定
+        _, image = cv2.threshold(
+            image, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+        # 截圖高於目標高度時等比縮小，減少OCR處理的像素量
+        height = image.shape[0]
+        if height > OCR_TARGET_HEIGHT + 8:
+            scale = OCR_TARGET_HEIGHT / height
+            image = cv2.resize(
+                image,
+                (int(image.shape[1] * scale), OCR_TARGET_HEIGHT),
+                interpolation=cv2.INTER_AREA
+            )
+        return image
+
+    def _detect_all_overtime(self):
+        """批次OCR檢測所有啟用職位的任職時間
+
+        把全部時間區域縱向拼接成一張圖後只調用一次Tesseract——
+        每次調用的進程啟動成本遠高於實際識別時間。
+
+        Returns:
+            dict: 職位ID到是否超時的映射；
+                無法批次檢測（行數對不上等）時返回None
+        """
+        if pytesseract is None:
+            return None
+
+        positions = [p for p in self.positions
+                     if p.is_enabled and p.time_region]
+        if len(positions) < 2:
+            return None
+
+        try:
+            # 鎖定一張幀，確保所有時間區域取自同一時刻的畫面
+            self.image_detector.begin_frame()
+            try:
+                screen = self.image_detector.get_screen_image()
+                if screen is None:
+                    return None
+
+                # 確認鎖定的幀確實是職位列表畫面：
+                # 行數吻合不足以證明裁到的是任職時間
+                if not self.image_detector.find_template(
+                        "ui/position_list_indicator.png",
+                        screen_image=screen):
+                    self.logger.debug("未確認職位列表畫面，退回逐職位檢測")
+                    return None
+
+                # 裁剪並預處理每個時間區域，補齊寬度後以白色分隔條拼接
+                strips = []
+                for position in positions:
+                    x, y, width, height = position.time_region
+                    strips.append(self._prepare_ocr_image(
+                        screen[y:y+height, x:x+width]))
+            finally:
+                self.image_detector.end_frame()
+
+            max_width = max(strip.shape[1] for strip in strips)
+            separator = np.full((10, max_width), 255, dtype=np.uint8)
+            rows = []
+            for i, strip in enumerate(strips):
+                if strip.shape[1] < max_width:
+                    strip = cv2.copyMakeBorder(
+                        strip, 0, 0, 0, max_width - strip.shape[1],
+                        cv2.BORDER_CONSTANT, value=255)
+                if i:
+                    rows.append(separator)
+                rows.append(strip)
+            stacked = cv2.vconcat(rows)
+
+            text = pytesseract.image_to_string(
+                stacked, config=self._ocr_batch_config)
+            matches = TIME_PATTERN.findall(text)
+
+            # 識別出的時間行數與職位數不符時無法可靠對應，退回逐職位檢測
+            if len(matches) != len(positions):
+                self.logger.debug(
+                    f"批次OCR行數不符（{len(matches)}/{len(positions)}），退回逐職位檢測")
+                return None
+
+            results = {}
+            for position, (hours, minutes, seconds) in zip(positions, matches):
+                total_minutes = _parse_hms_to_minutes(f"{hours}:{minutes}:{seconds}")
+                is_overtime = total_minutes > position.overtime_threshold
+                results[position.id] = is_overtime
+                if is_overtime:
+                    self.logger.info(
+                        f"職位 '{position.name}' 已超時: {hours}小時{minutes}分鐘{seconds}秒 "
+                        f"(閾值: {position.overtime_threshold}分鐘)")
+            return results
+
+        except Exception as e:
+            self.logger.warning(f"批次OCR檢測失敗，退回逐職位檢測: {str(e)}")
+            return None
+
     def _detect_position_overtime(self, position):
         """使用OCR檢測職位是否超時
         
@@ -447,16 +709,11 @@ class PositionManager:
         Returns:
             bool: 是否超時
         """
+        if pytesseract is None:
+            self.logger.warning("未安裝pytesseract，無法檢測職位任職時間")
+            return False
+        
         try:
-            import pytesseract
-            from PIL import Image
-            import re
-            import os
-            
-            # 設置Tesseract路徑 (Windows需要)
-            if os.name == 'nt' and 'ocr' in self.config and 'tesseract_path' in self.config['ocr']:
-                pytesseract.pytesseract.tesseract_cmd = self.config['ocr']['tesseract_path']
-            
             # 獲取時間顯示區域的截圖
             if not position.time_region:
                 self.logger.warning(f"職位 '{position.name}' 未配置時間區域")
@@ -465,49 +722,37 @@ class PositionManager:
             time_region = position.time_region
             time_image = self.image_detector.get_screen_image(region=time_region)
             
-            # 轉換為PIL Image格式
-            pil_image = Image.fromarray(time_image)
+            # 保持numpy格式直接交給OCR（pytesseract接受ndarray），
+            # 不經過PIL的來回轉換拷貝
+            ocr_image = time_image
             
-            # 是否進行圖像預處理
-            if self.config.get('ocr', {}).get('preprocessing', True):
-                # 將圖像轉換為灰度
-                pil_image = pil_image.convert('L')
-                
-                # 可以添加更多預處理步驟，如果需要的話
-                # 例如：增加對比度、二值化等
+            # 圖像預處理（灰度、二值化、縮放）
+            ocr_image = self._prepare_ocr_image(ocr_image)
             
             # 使用OCR識別文本，設置配置以優化數字和冒號識別
             text = pytesseract.image_to_string(
-                pil_image, 
-                config='--psm 7 --oem 3 -c tessedit_char_whitelist=0123456789:'
+                ocr_image, 
+                config=self._ocr_config
             )
             
             # 清理文本
             text = text.strip()
             self.logger.debug(f"職位 '{position.name}' OCR識別結果: '{text}'")
             
-            # 使用正則表達式解析時間格式 "00:00:00"
-            match = re.search(r'(\d+):(\d+):(\d+)', text)
+            # 解析時間格式 "00:00:00" 並轉換為總分鐘數
+            total_minutes = _parse_hms_to_minutes(text)
             
-            if not match:
+            if total_minutes is None:
                 self.logger.warning(f"職位 '{position.name}' 無法解析時間格式: {text}")
                 return False
             
-            # 提取小時、分鐘和秒
-            hours = int(match.group(1))
-            minutes = int(match.group(2))
-            seconds = int(match.group(3))
-            
-            # 轉換為總分鐘數
-            total_minutes = hours * 60 + minutes + seconds / 60
-            
             # 與閾值比較
             is_overtime = total_minutes > position.overtime_threshold
             
             if is_overtime:
-                self.logger.info(f"職位 '{position.name}' 已超時: {hours}小時{minutes}分鐘{seconds}秒 (閾值: {position.overtime_threshold}分鐘)")
+                self.logger.info(f"職位 '{position.name}' 已超時: 任職{total_minutes:.1f}分鐘 (閾值: {position.overtime_threshold}分鐘)")
             else:
-                self.logger.debug(f"職位 '{position.name}' 未超時: {hours}小時{minutes}分鐘{seconds}秒 (閾值: {position.overtime_threshold}分鐘)")
+                self.logger.debug(f"職位 '{position.name}' 未超時: 任職{total_minutes:.1f}分鐘 (閾值: {position.overtime_threshold}分鐘)")
             
             # 如果啟用了調試圖像保存
             if self.config.get('ocr', {}).get('debug_save_images', False):
@@ -541,7 +786,7 @@ class PositionManager:
         if match:
             x, y = match[0], match[1]
             self.action_executor.click_at(x, y)
-            time.sleep(1)  # 等待響應
+            # 確認對話框的出現由_confirm_dismissal輪詢等待，無需固定休眠
             self.logger.debug(f"已點擊職位 '{position.name}' 的罷黜按鈕")
             return True
         
@@ -557,11 +802,12 @@ class PositionManager:
         self.logger.debug("嘗試確認罷黜操作")
         
         # 示例代碼:
+        # 等待確認對話框出現（由點擊罷黜觸發），出現即點擊
         confirm_template = "images/positions/confirm_dismissal.png"
-        match = self.image_detector.find_template(confirm_template)
+        match = self.image_detector.wait_for_template(confirm_template, timeout=2)
         
         if match:
-            x, y = match[0], match[1]
+            x, y = match
             self.action_executor.click_at(x, y)
             time.sleep(1)  # 等待確認
             self.logger.debug("已確認罷黜操作")
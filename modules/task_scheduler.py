@@ -7,6 +7,7 @@
 """
 
 import time
+import heapq
 import logging
 import threading
 from collections import deque
@@ -81,13 +82,36 @@ class TaskScheduler:
     def __init__(self):
         """初始化任務排程器"""
         self.logger = logging.getLogger("TaskScheduler")
-        self.tasks = []  # 任務列表
+        self.tasks = []  # 任務列表（供狀態查詢迭代）
+        self._task_index = {}  # 任務ID到任務對象的索引，按ID查找為O(1)
+        # 到期堆：(到期時間, -優先級, 任務ID)，同時到期時高優先級先出堆。
+        # 條目過期（任務被移除或時間被重啟等更新）時採用懶惰刪除：
+        # 出堆時與任務實際狀態比對，不符即丟棄
+        self._due_heap = []
         self.is_paused = False  # 排程器暫停狀態
         self.current_task_index = None  # 當前執行的任務索引
         self.lock = threading.Lock()  # 線程鎖
+        self._wake_callback = None  # 到期時間變化時喚醒主循環的回調
         
         self.logger.info("任務排程器初始化完成")
     
+    def set_wake_callback(self, callback):
+        """設置喚醒回調
+        
+        主循環按next_due_in()計算的時長休眠；
+        當add_task/restart_task等操作使任務提前到期時，
+        通過此回調喚醒主循環立即重新評估，而非等滿當前休眠。
+        
+        Args:
+            callback (function): 無參數的喚醒函數
+        """
+        self._wake_callback = callback
+    
+    def _wake(self):
+        """通知主循環重新評估下一個到期時間（不應持鎖調用）"""
+        if self._wake_callback is not None:
+            self._wake_callback()
+    
     def add_task(self, id, name, priority, interval_minutes=None, interval_seconds=None, action=None):
         """添加任務
         
@@ -104,20 +128,20 @@ class TaskScheduler:
         """
         with self.lock:
             # 檢查是否已存在同ID的任務
-            for task in self.tasks:
-                if task.id == id:
-                    self.logger.warning(f"已存在ID為 '{id}' 的任務，無法添加")
-                    return None
+            if id in self._task_index:
+                self.logger.warning(f"已存在ID為 '{id}' 的任務，無法添加")
+                return None
             
             # 創建新任務
             task = Task(id, name, priority, interval_minutes, interval_seconds, action)
             self.tasks.append(task)
-            
-            # 按優先級排序任務列表
-            self.tasks.sort(key=lambda t: t.priority, reverse=True)
+            self._task_index[id] = task
+            self._push_task(task)
             
             self.logger.info(f"添加任務 '{name}' (ID: {id})")
-            return task
+        
+        self._wake()
+        return task
     
     def remove_task(self, task_id):
         """移除任務
@@ -129,22 +153,38 @@ class TaskScheduler:
             bool: 是否成功移除
         """
         with self.lock:
-            # 查找任務
-            for i, task in enumerate(self.tasks):
-                if task.id == task_id:
-                    # 檢查是否是當前執行的任務
-                    if self.current_task_index is not None and i == self.current_task_index:
-                        task.is_running = False
-                        self.current_task_index = None
-                    
-                    # 移除任務
-                    self.tasks.pop(i)
-                    self.logger.info(f"移除任務 '{task.name}' (ID: {task_id})")
-                    return True
+            # 從索引查找任務
+            task = self._task_index.pop(task_id, None)
+            if task is None:
+                self.logger.warning(f"找不到ID為 '{task_id}' 的任務，無法移除")
+                return False
             
-            self.logger.warning(f"找不到ID為 '{task_id}' 的任務，無法移除")
-            return False
+            i = self.tasks.index(task)
+            
+            # 檢查是否是當前執行的任務
+            if self.current_task_index is not None and i == self.current_task_index:
+                task.is_running = False
+                self.current_task_index = None
+            
+            # 移除任務
+            self.tasks.pop(i)
+            self.logger.info(f"移除任務 '{task.name}' (ID: {task_id})")
+            return True
     
+    def _push_task(self, task):
+        """將任務的下一次到期時間壓入到期堆
+
+        必須在持有self.lock時調用；每當任務的執行時間被更新
+        （執行完成、重啟、恢復等）都應重新壓入。
+
+        Args:
+            task (Task): 任務對象
+        """
+        heapq.heappush(
+            self._due_heap,
+            (task.last_execution_time + task.interval_seconds,
+             -task.priority, task.id))
+
     def get_task(self, task_id):
         """獲取任務
         
@@ -154,10 +194,7 @@ class TaskScheduler:
         Returns:
             Task: 任務對象，如果不存在則返回None
         """
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self._task_index.get(task_id)
     
     def get_current_task(self):
         """獲取當前正在執行的任務
@@ -169,6 +206,29 @@ class TaskScheduler:
             return self.tasks[self.current_task_index]
         return None
     
+    def next_due_in(self):
+        """計算距離下一個任務到期的秒數
+
+        Returns:
+            float: 剩餘秒數（已到期為0）；沒有可排程的任務時返回None
+        """
+        with self.lock:
+            # 有任務正在執行時應立即繼續推進
+            if self.current_task_index is not None:
+                return 0.0
+
+            now = time.time()
+            while self._due_heap:
+                next_due, _, task_id = self._due_heap[0]
+                task = self._task_index.get(task_id)
+                # 懶惰刪除：丟棄已失效的堆頂條目
+                if (task is None or task.paused or task.is_running or
+                        next_due != task.last_execution_time + task.interval_seconds):
+                    heapq.heappop(self._due_heap)
+                    continue
+                return max(next_due - now, 0.0)
+            return None
+
     def execute_current_task_step(self):
         """執行當前任務步驟"""
         # 如果排程器已暫停，則不執行任何操作
@@ -180,55 +240,81 @@ class TaskScheduler:
             if self.current_task_index is None:
                 self._select_next_task()
             
-            # 獲取當前任務並執行
+            # 獲取當前任務
             current_task = self.get_current_task()
-            if current_task and current_task.is_running:
-                self._execute_task(current_task)
+            if not (current_task and current_task.is_running):
+                return
+        
+        # 在鎖外執行任務：動作通常是數秒級的UI操作，
+        # 持鎖執行會阻塞add_task/pause_task/狀態查詢等所有其他線程
+        self._execute_task(current_task)
     
     def _select_next_task(self):
-        """選擇下一個要執行的任務"""
-        # 選擇優先級最高的應該運行的任務
-        for i, task in enumerate(self.tasks):
-            if task.should_run():
-                task.is_running = True
-                task.last_execution_time = time.time()
-                task.execution_count += 1
-                task.current_step = 0
-                self.current_task_index = i
-                self.logger.info(f"開始執行任務 '{task.name}' (ID: {task.id})")
+        """選擇下一個要執行的任務
+
+        從到期堆取出最早到期的任務（同時到期時高優先級優先），
+        堆頂未到期時直接返回，不再逐一輪詢所有任務。
+        """
+        now = time.time()
+        while self._due_heap:
+            next_due, _, task_id = self._due_heap[0]
+            if next_due > now:
                 return
+            heapq.heappop(self._due_heap)
+            task = self._task_index.get(task_id)
+            # 懶惰刪除：任務已移除、已暫停（恢復時會重新入堆）
+            # 或條目時間與任務當前狀態不符（已被重啟等更新）
+            if task is None or task.paused or task.is_running:
+                continue
+            if next_due != task.last_execution_time + task.interval_seconds:
+                continue
+            task.is_running = True
+            task.last_execution_time = now
+            task.execution_count += 1
+            task.current_step = 0
+            self.current_task_index = self.tasks.index(task)
+            self.logger.info(f"開始執行任務 '{task.name}' (ID: {task.id})")
+            return
     
     def _execute_task(self, task):
         """執行任務
+
+        調用者不應持有self.lock：任務動作在鎖外執行，
+        只在更新任務狀態時短暫加鎖。
         
         Args:
             task (Task): 要執行的任務
         """
+        # 執行任務動作（鎖外）
+        result = False
+        action_error = None
         try:
-            # 執行任務動作
             result = task.action()
-            
-            # 任務執行完成
+        except Exception as e:
+            action_error = e
+        
+        # 任務執行完成，在鎖內更新狀態並安排下一次執行
+        with self.lock:
             task.is_running = False
             self.current_task_index = None
-            
-            if result:
+            self._push_task(task)
+            if action_error is None and result:
                 task.consecutive_failures = 0
-                self.logger.info(f"任務 '{task.name}' 執行成功")
             else:
                 task.consecutive_failures += 1
-                self.logger.warning(f"任務 '{task.name}' 返回失敗，連續失敗次數: {task.consecutive_failures}")
-                
-                # 如果連續失敗次數超過閾值，增加間隔時間
-                if task.consecutive_failures >= task.max_retries:
-                    self.logger.warning(f"任務 '{task.name}' 連續失敗次數過多，將增加間隔時間")
-                    # 這裏可以實現任務間隔時間的動態調整
+            failures = task.consecutive_failures
         
-        except Exception as e:
-            self.logger.error(f"執行任務 '{task.name}' 時出錯: {str(e)}")
-            task.is_running = False
-            self.current_task_index = None
-            task.consecutive_failures += 1
+        if action_error is not None:
+            self.logger.error(f"執行任務 '{task.name}' 時出錯: {str(action_error)}")
+        elif result:
+            self.logger.info(f"任務 '{task.name}' 執行成功")
+        else:
+            self.logger.warning(f"任務 '{task.name}' 返回失敗，連續失敗次數: {failures}")
+            
+            # 如果連續失敗次數超過閾值，增加間隔時間
+            if failures >= task.max_retries:
+                self.logger.warning(f"任務 '{task.name}' 連續失敗次數過多，將增加間隔時間")
+                # 這裏可以實現任務間隔時間的動態調整
     
     def pause_scheduler(self):
         """暫停排程器"""
@@ -241,6 +327,7 @@ class TaskScheduler:
         with self.lock:
             self.is_paused = False
             self.logger.info("任務排程器已恢復")
+        self._wake()
     
     def pause_task(self, task_id):
         """暫停指定任務
@@ -272,7 +359,9 @@ class TaskScheduler:
         if task:
             with self.lock:
                 task.paused = False
+                self._push_task(task)
                 self.logger.info(f"任務 '{task.name}' 已恢復")
+            self._wake()
             return True
         return False
     
@@ -293,7 +382,9 @@ class TaskScheduler:
                 task.current_step = 0
                 task.consecutive_failures = 0
                 task.paused = False
+                self._push_task(task)
                 self.logger.info(f"任務 '{task.name}' 已重啟")
+            self._wake()
             return True
         return False
     
@@ -312,10 +403,19 @@ class TaskScheduler:
                 task.current_step = 0
                 task.consecutive_failures = 0
             
+            # 重建到期堆，丟棄所有過期條目
+            self._due_heap = [
+                (task.interval_seconds, -task.priority, task.id)
+                for task in self.tasks
+            ]
+            heapq.heapify(self._due_heap)
+            
             self.current_task_index = None
             self.is_paused = False
             
             self.logger.info("任務排程器已重置")
+        
+        self._wake()
     
     def skip_current_task(self):
         """跳過當前任務"""
@@ -323,6 +423,7 @@ class TaskScheduler:
             if self.current_task_index is not None:
                 current_task = self.tasks[self.current_task_index]
                 current_task.is_running = False
+                self._push_task(current_task)
                 self.logger.info(f"跳過當前任務 '{current_task.name}'")
                 self.current_task_index = None
                 return True
@@ -336,14 +437,19 @@ class TaskScheduler:
         Returns:
             list: 任務狀態列表
         """
+        # 在鎖內取得列表快照，避免與add_task/remove_task的
+        # 並發修改衝突；各欄位讀取在鎖外進行，不阻塞排程
+        with self.lock:
+            snapshot = list(self.tasks)
+        
         status_list = []
         
-        for task in self.tasks:
+        for task in snapshot:
             status = {
                 "id": task.id,
                 "name": task.name,
                 "priority": task.priority,
-                "interval_minutes": task.interval_minutes,
+                "interval_minutes": task.interval_seconds / 60,
                 "last_execution_time": task.last_execution_time,
                 "is_running": task.is_running,
                 "execution_count": task.execution_count,
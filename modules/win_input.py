@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Win32批次輸入模組
+透過SendInput將多個鍵盤事件合併為單一系統調用送出，
+供動作執行器在動作序列與批次按鍵操作時使用。
+非Windows平台上所有函數安全退化為不可用。
+"""
+
+import sys
+
+SENDINPUT_AVAILABLE = sys.platform == 'win32'
+
+# 掃描碼表（Scan Code Set 1），涵蓋本系統使用的按鍵名稱
+SCANCODES = {
+    'esc': 0x01, 'escape': 0x01,
+    '1': 0x02, '2': 0x03, '3': 0x04, '4': 0x05, '5': 0x06,
+    '6': 0x07, '7': 0x08, '8': 0x09, '9': 0x0A, '0': 0x0B,
+    '-': 0x0C, '=': 0x0D,
+    'backspace': 0x0E, 'tab': 0x0F,
+    'q': 0x10, 'w': 0x11, 'e': 0x12, 'r': 0x13, 't': 0x14,
+    'y': 0x15, 'u': 0x16, 'i': 0x17, 'o': 0x18, 'p': 0x19,
+    '[': 0x1A, ']': 0x1B,
+    'enter': 0x1C, 'return': 0x1C,
+    'ctrl': 0x1D, 'ctrlleft': 0x1D,
+    'a': 0x1E, 's': 0x1F, 'd': 0x20, 'f': 0x21, 'g': 0x22,
+    'h': 0x23, 'j': 0x24, 'k': 0x25, 'l': 0x26,
+    ';': 0x27, "'": 0x28, '`': 0x29,
+    'shift': 0x2A, 'shiftleft': 0x2A,
+    '\\': 0x2B,
+    'z': 0x2C, 'x': 0x2D, 'c': 0x2E, 'v': 0x2F, 'b': 0x30,
+    'n': 0x31, 'm': 0x32,
+    ',': 0x33, '.': 0x34, '/': 0x35,
+    'shiftright': 0x36,
+    'alt': 0x38, 'altleft': 0x38,
+    'space': 0x39, ' ': 0x39,
+    'capslock': 0x3A,
+    'f1': 0x3B, 'f2': 0x3C, 'f3': 0x3D, 'f4': 0x3E, 'f5': 0x3F,
+    'f6': 0x40, 'f7': 0x41, 'f8': 0x42, 'f9': 0x43, 'f10': 0x44,
+    'f11': 0x57, 'f12': 0x58,
+    'home': 0x47, 'up': 0x48, 'pageup': 0x49,
+    'left': 0x4B, 'right': 0x4D,
+    'end': 0x4F, 'down': 0x50, 'pagedown': 0x51,
+    'insert': 0x52, 'delete': 0x53,
+    'win': 0x5B, 'winleft': 0x5B,
+    'ctrlright': 0x1D, 'altright': 0x38,
+    'numlock': 0x45, 'scrolllock': 0x46,
+    'num0': 0x52, 'num1': 0x4F, 'num2': 0x50, 'num3': 0x51,
+    'num4': 0x4B, 'num5': 0x4C, 'num6': 0x4D,
+    'num7': 0x47, 'num8': 0x48, 'num9': 0x49,
+    'multiply': 0x37, 'subtract': 0x4A, 'add': 0x4E, 'decimal': 0x53,
+}
+
+# 需要設置extended位的按鍵（Set 1中帶0xE0前綴者）
+EXTENDED_KEYS = frozenset([
+    'up', 'down', 'left', 'right',
+    'home', 'end', 'pageup', 'pagedown',
+    'insert', 'delete', 'win', 'winleft',
+    'ctrlright', 'altright',
+])
+
+if SENDINPUT_AVAILABLE:
+    import ctypes
+    from ctypes import wintypes
+
+    INPUT_KEYBOARD = 1
+    KEYEVENTF_EXTENDEDKEY = 0x0001
+    KEYEVENTF_KEYUP = 0x0002
+    KEYEVENTF_SCANCODE = 0x0008
+
+    class KEYBDINPUT(ctypes.Structure):
+        _fields_ = [
+            ("wVk", wintypes.WORD),
+            ("wScan", wintypes.WORD),
+            ("dwFlags", wintypes.DWORD),
+            ("time", wintypes.DWORD),
+            ("dwExtraInfo", ctypes.c_size_t),
+        ]
+
+    class _INPUT_UNION(ctypes.Union):
+        _fields_ = [("ki", KEYBDINPUT)]
+
+    class INPUT(ctypes.Structure):
+        _fields_ = [
+            ("type", wintypes.DWORD),
+            ("union", _INPUT_UNION),
+        ]
+
+    _SendInput = ctypes.windll.user32.SendInput
+    _INPUT_SIZE = ctypes.sizeof(INPUT)
+
+
+def _normalize_key(key):
+    """規範化按鍵名稱
+
+    具名按鍵（'Enter'、'ESC'等）不分大小寫；單字符按鍵保持原樣——
+    掃描碼表只有小寫字母，'H'等需要shift的字符不在表中，
+    由調用方退回逐字輸入路徑處理，避免被靜默轉成小寫送出。
+
+    Args:
+        key (str): 按鍵名稱
+
+    Returns:
+        str: 規範化後的按鍵名稱
+    """
+    return key if len(key) == 1 else key.lower()
+
+
+def supports_key(key):
+    """檢查按鍵是否可由本模組送出
+
+    Args:
+        key (str): 按鍵名稱（具名按鍵大小寫不敏感，單字符大小寫有別）
+
+    Returns:
+        bool: 平台支持且按鍵有對應掃描碼時為True
+    """
+    return SENDINPUT_AVAILABLE and _normalize_key(key) in SCANCODES
+
+
+def send_key_events(events):
+    """將一組鍵盤事件以單一SendInput調用送出
+
+    Args:
+        events (list): 事件列表，每項為 (key, is_up) 元組
+
+    Returns:
+        bool: 是否全部成功送出
+    """
+    if not SENDINPUT_AVAILABLE or not events:
+        return False
+
+    inputs = (INPUT * len(events))()
+    for inp, (key, is_up) in zip(inputs, events):
+        key = _normalize_key(key)
+        scan = SCANCODES.get(key)
+        if scan is None:
+            return False
+
+        flags = KEYEVENTF_SCANCODE
+        if is_up:
+            flags |= KEYEVENTF_KEYUP
+        if key in EXTENDED_KEYS:
+            flags |= KEYEVENTF_EXTENDEDKEY
+
+        inp.type = INPUT_KEYBOARD
+        inp.union.ki = KEYBDINPUT(0, scan, flags, 0, 0)
+
+    sent = _SendInput(len(events), inputs, _INPUT_SIZE)
+    return sent == len(events)
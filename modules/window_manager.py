@@ -44,7 +44,18 @@ class WindowManager:
         
         # 窗口處理句柄
         self.window_handle = None
-        
+
+        # 前景窗口變更追蹤：由WinEvent鉤子在前景切換時設置標誌，
+        # 使前景檢查從每輪輪詢退化為事件觸發。
+        # 鉤子與其消息泵線程在首次consume_foreground_change時才安裝——
+        # 只設置窗口位置的臨時實例（如game_manager啟動遊戲時）
+        # 不會各自遺留一條鉤子線程
+        self._fg_changed = threading.Event()
+        self._fg_changed.set()  # 初始視為已變更，確保首次檢查會執行
+        self._fg_hook_active = False
+        self._fg_hook_started = False
+        self._fg_hook_thread_id = None
+
         # 啟動窗口位置監控線程（如果需要）
         if self.force_window_position:
             self._start_window_position_monitor()
@@ -52,6 +63,83 @@ class WindowManager:
         self.logger.info("視窗管理器初始化完成")
         self.logger.info(f"窗口設置: 位置={self.window_position}, 大小={self.window_size}")
         
+    def _start_foreground_hook(self):
+        """啟動前景窗口變更鉤子線程
+
+        透過SetWinEventHook訂閱EVENT_SYSTEM_FOREGROUND事件，
+        鉤子需要消息泵，故在專用線程中運行GetMessageW循環。
+        鉤子安裝失敗時標誌保持不啟用，前景檢查退化為每次都執行。
+        shutdown以WM_QUIT結束消息泵，鉤子在安裝線程上解除。
+        """
+        EVENT_SYSTEM_FOREGROUND = 0x0003
+        WINEVENT_OUTOFCONTEXT = 0x0000
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None,
+            wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG,
+            wintypes.DWORD, wintypes.DWORD
+        )
+
+        def on_foreground_change(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+            self._fg_changed.set()
+
+        # 保持回調引用，避免被垃圾回收
+        self._fg_hook_proc = WinEventProc(on_foreground_change)
+
+        def hook_loop():
+            user32 = ctypes.windll.user32
+            self._fg_hook_thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+            hook = user32.SetWinEventHook(
+                EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND,
+                0, self._fg_hook_proc, 0, 0, WINEVENT_OUTOFCONTEXT
+            )
+            if not hook:
+                self.logger.warning("無法安裝前景窗口鉤子，前景檢查將退化為輪詢")
+                return
+
+            self._fg_hook_active = True
+            self.logger.debug("前景窗口鉤子已安裝")
+
+            # 消息泵：鉤子回調在此線程的消息處理中被調用，
+            # GetMessageW在收到WM_QUIT（shutdown發出）時返回0
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) != 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+
+            # 鉤子必須在安裝它的線程上解除
+            user32.UnhookWinEvent(hook)
+            self._fg_hook_active = False
+            self.logger.debug("前景窗口鉤子已解除")
+
+        hook_thread = threading.Thread(target=hook_loop, daemon=True, name="ForegroundHook")
+        hook_thread.start()
+
+    def consume_foreground_change(self):
+        """檢查並清除前景窗口變更標誌
+
+        Returns:
+            bool: 自上次調用以來前景窗口是否可能改變；
+                  鉤子不可用時始終返回True（退化為每次都檢查）
+        """
+        # 首次調用時才安裝鉤子（只有引擎的共享實例會走到這裡）
+        if not self._fg_hook_started:
+            self._fg_hook_started = True
+            self._start_foreground_hook()
+
+        if not self._fg_hook_active:
+            return True
+
+        if self._fg_changed.is_set():
+            self._fg_changed.clear()
+            return True
+        return False
+
+    def mark_foreground_dirty(self):
+        """標記前景窗口需要重新檢查（例如置前操作失敗後）"""
+        self._fg_changed.set()
+
     def _start_window_position_monitor(self):
         """啟動窗口位置監控線程"""
         def monitor_window_position():
@@ -497,6 +585,9 @@ class WindowManager:
             return False
     
     def shutdown(self):
-        """清理資源"""
+        """清理資源：結束前景鉤子的消息泵線程"""
         self.logger.info("關閉視窗管理器")
-        # 目前沒有需要清理的資源
\ No newline at end of file
+        if self._fg_hook_started and self._fg_hook_thread_id:
+            WM_QUIT = 0x0012
+            ctypes.windll.user32.PostThreadMessageW(
+                self._fg_hook_thread_id, WM_QUIT, 0, 0)
\ No newline at end of file
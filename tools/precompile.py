@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+部署前字節碼預編譯工具
+
+在打包/部署階段執行一次，將主入口與各模組預先編譯為.pyc，
+使系統啟動時（尤其是重啟命令觸發的os.execl重啟）不必
+重新編譯CoreEngine、ControlClient等大模組。
+
+用法:
+    python tools/precompile.py
+"""
+
+import compileall
+import os
+import sys
+
+# 需要預編譯的頂層文件與套件目錄
+TARGETS = [
+    "main.py",
+    "control_client.py",
+    "ui_control.py",
+    "modules",
+    "tasks",
+]
+
+
+def main():
+    """對專案的主要模組執行字節碼預編譯"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    success = True
+
+    for target in TARGETS:
+        path = os.path.join(root, target)
+        if not os.path.exists(path):
+            print(f"跳過不存在的目標: {target}")
+            continue
+
+        if os.path.isdir(path):
+            ok = compileall.compile_dir(path, quiet=1)
+        else:
+            ok = compileall.compile_file(path, quiet=1)
+        success = success and bool(ok)
+
+    if success:
+        print("字節碼預編譯完成")
+        return 0
+
+    print("部分文件編譯失敗")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
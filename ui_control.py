@@ -249,8 +249,8 @@ class StatusUI:
             self.system_status_label.config(text=status)
             
             # 更新運行時間
-            if self.engine.start_time:
-                runtime = time.time() - self.engine.start_time
+            runtime = self.engine.get_runtime_seconds()
+            if runtime is not None:
                 hours = int(runtime // 3600)
                 minutes = int((runtime % 3600) // 60)
                 seconds = int(runtime % 60)